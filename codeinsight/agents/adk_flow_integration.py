@@ -1,37 +1,56 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any, Iterable, List, Optional, Tuple
+from typing import Dict, Any, Iterable, List, Mapping, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 import os
 import json
+import hashlib
+import heapq
+import mmap
+import re
+from functools import lru_cache
+from operator import itemgetter
 
 from codeinsight.analyzers.pylint_runner import run_pylint
 from codeinsight.analyzers.radon_runner import run_radon
-from codeinsight.agents.agent_factory import get_agent_from_env
+from codeinsight.agents.agent_factory import get_agent
+from codeinsight.agents.null_agent import NullAgent
+from codeinsight.cache import store as cache_store
+from codeinsight.cache.manifest import file_digests
 
 
-"""adk imports with fallback so UI never crashes"""
+"""adk is imported on first use (with fallback) so startup stays cheap and UI never crashes"""
 USE_ADK: bool = (os.getenv("CODEINSIGHT_USE_ADK", "1") == "1")  # default ON
-try:
-    from google.adk import Agent  # noqa: F401 (import proves availability)
-    from google.adk.flows.llm_flows.single_flow import SingleFlow
-    ADK_OK = True
-except Exception:
-    SingleFlow = None  # type: ignore
-    ADK_OK = False
 
+@lru_cache(maxsize=1)
+def _adk_single_flow():
+    """SingleFlow class, or None when google-adk is not installed"""
+    try:
+        from google.adk.flows.llm_flows.single_flow import SingleFlow
+        return SingleFlow
+    except Exception:
+        return None
 
-def _avg_mi(res: Dict) -> float:
-    files = (res.get("radon", {}) or {}).get("files", [])
+
+def _radon_means(radon: Dict) -> Tuple[float, float]:
+    """(mi_avg, cc_avg) as precomputed by run_radon; one pass over files for older results"""
+    rsum = radon.get("summary") or {}
+    if "mi_avg" in rsum and "cc_avg" in rsum:
+        return float(rsum["mi_avg"]), float(rsum["cc_avg"])
+    files = radon.get("files") or []
     if not files:
-        return 0.0
-    return round(sum(float(f["mi"]) for f in files) / len(files), 2)
+        return 0.0, 0.0
+    s_mi = s_cc = 0.0
+    for f in files:
+        s_mi += float(f.get("mi", 0.0))
+        s_cc += float(f.get("cc_avg", 0.0))
+    return s_mi / len(files), s_cc / len(files)
+
+def _avg_mi(res: Dict) -> float:
+    return round(_radon_means(res.get("radon", {}) or {})[0], 2)
 
 def _avg_cc(res: Dict) -> float:
-    files = (res.get("radon", {}) or {}).get("files", [])
-    if not files:
-        return 0.0
-    return round(sum(float(f["cc_avg"]) for f in files) / len(files), 2)
+    return round(_radon_means(res.get("radon", {}) or {})[1], 2)
 
 def _pylint_total(res: Dict) -> int:
     return int(((res.get("pylint") or {}).get("summary") or {}).get("total", 0))
@@ -40,6 +59,38 @@ def _pylint_total(res: Dict) -> int:
 def _clamp(x: float, lo: float = 0.0, hi: float = 100.0) -> int:
     return int(max(lo, min(hi, x))) # returns int
 
+# quality score weights (see _compute_quality_score)
+PYLINT_W = {"C": 0.6, "R": 0.8, "W": 1.0, "E": 3.0, "F": 8.0}
+RADON_W_MI = 2.0   # per spec
+RADON_W_CC = 1.5   # per spec
+DENSITY_THRESHOLD = 3.0
+DENSITY_SLOPE = 2.0
+
+# pylint type keys (short and long form, lowercased) -> short code
+_KEY_ALIAS = {
+    "c": "C", "convention": "C",
+    "r": "R", "refactor": "R",
+    "w": "W", "warning": "W",
+    "e": "E", "error": "E",
+    "f": "F", "fatal": "F",
+}
+
+# per-message penalty for each pylint type key, built once from the two tables above
+_PYLINT_PENALTY = {k: PYLINT_W[code] for k, code in _KEY_ALIAS.items()}
+
+def _pylint_penalty(bt: Dict[str, Any]) -> float:
+    """weighted pylint penalty straight from by_type (short/long keys, any case)"""
+    total = 0.0
+    for k, v in bt.items():
+        w = _PYLINT_PENALTY.get(str(k).strip().lower())
+        if w is None:
+            continue
+        try:
+            total += w * int(v)
+        except Exception:
+            continue
+    return total
+
 def _compute_quality_score(result: Dict[str, Any]) -> int:
     """
     Returns an integer quality score in [0, 100].
@@ -55,63 +106,53 @@ def _compute_quality_score(result: Dict[str, Any]) -> int:
           if msgs/file > 3.0 → (per_file - 3.0) * 2.0
     Clamped to [0, 100].
     """
+    # unpack once; everything below works on these locals
     radon = result.get("radon") or {}
+    rsum = radon.get("summary") or {}
     r_files = radon.get("files") or []
+    psum = (result.get("pylint") or {}).get("summary") or {}
 
-    # Base from MI
+    # Base from MI (mean precomputed by run_radon)
     if r_files:
-        mi_vals = [float(f.get("mi", 0.0)) for f in r_files]
-        avg_mi = sum(mi_vals) / max(1, len(mi_vals))
+        avg_mi = _radon_means(radon)[0]
     else:
         avg_mi = 50.0  # neutral base if MI unknown
 
-    # Pylint penalties
-    by_type_raw = ((result.get("pylint") or {}).get("summary") or {}).get("by_type", {}) or {}
-    def _pylint_counts(bt: Dict[str, Any]) -> Dict[str, int]:
-        out = {"C": 0, "R": 0, "W": 0, "E": 0, "F": 0}
-        for k, v in bt.items():
-            try:
-                n = int(v)
-            except Exception:
-                continue
-            key = str(k).strip().lower()
-            if key in ("c", "convention"):
-                out["C"] += n
-            elif key in ("r", "refactor"):
-                out["R"] += n
-            elif key in ("w", "warning"):
-                out["W"] += n
-            elif key in ("e", "error"):
-                out["E"] += n
-            elif key in ("f", "fatal"):
-                out["F"] += n
-        return out
-
-    counts = _pylint_counts(by_type_raw)
-    PYLINT_W = {"C": 0.6, "R": 0.8, "W": 1.0, "E": 3.0, "F": 8.0}
-    pylint_penalty = sum(PYLINT_W[k] * counts[k] for k in counts)
-
-    # Radon penalties
-    rsum = (radon.get("summary") or {})
-    mi_warn = int(rsum.get("mi_warnings", 0))
-    cc_hot = int(rsum.get("cc_hotspots", 0))
-    RADON_W_MI = 2.0   # per spec
-    RADON_W_CC = 1.5   # per spec
-    radon_penalty = RADON_W_MI * mi_warn + RADON_W_CC * cc_hot
-
-    # Density penalty
-    total_msgs = int(((result.get("pylint") or {}).get("summary") or {}).get("total", 0))
+    # Density inputs
+    total_msgs = int(psum.get("total", 0))
     files_scanned = (len(r_files) or int(rsum.get("files") or 1))
-    per_file = total_msgs / max(1, files_scanned)
-    DENSITY_THRESHOLD = 3.0
-    DENSITY_SLOPE = 2.0
+
+    return _score_kernel(
+        avg_mi,
+        _pylint_penalty(psum.get("by_type") or {}),
+        int(rsum.get("mi_warnings", 0)),
+        int(rsum.get("cc_hotspots", 0)),
+        total_msgs / max(1, files_scanned),
+    )
+
+def _score_kernel(avg_mi: float, pylint_penalty: float, mi_warn: int, cc_hot: int, per_file: float) -> int:
+    """the scoring arithmetic alone, on plain numbers (see _compute_quality_score)"""
+    radon_penalty = RADON_W_MI * mi_warn + RADON_W_CC * cc_hot
     density_penalty = (per_file - DENSITY_THRESHOLD) * DENSITY_SLOPE if per_file > DENSITY_THRESHOLD else 0.0
 
-    # Final
     total_penalty = pylint_penalty + radon_penalty + density_penalty
     raw = avg_mi - total_penalty
     return _clamp(round(raw))  # assumes _clamp(x) -> int in [0,100]
 
+# worst first: highest CC, then lowest MI
+def _rank_key(f: Dict[str, Any]) -> Tuple[float, float]:
+    return (-f.get("cc_avg", 0.0), f.get("mi", 999.0))
+
+def _ranked_files(radon: Dict[str, Any], limit: Optional[int] = None,
+                  idx: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """radon files worst-first, from step_radon's ranking (idx) when given"""
+    files = radon.get("files") or []
+    if idx is not None and len(idx) == len(files):
+        return [files[i] for i in idx[:limit]]
+    if limit is not None:
+        return heapq.nsmallest(limit, files, key=_rank_key)
+    return sorted(files, key=_rank_key)
+
 # Workflow steps
 def step_radon(ctx: dict) -> dict:
     agent = ctx.get("agent")
@@ -119,7 +160,15 @@ def step_radon(ctx: dict) -> dict:
         agent.log("Step 1: Radon")
     code_dir: Path = ctx["code_dir"]
     cfg = ctx.get("radon_config", {"complexity_threshold": 10, "maintainability_threshold": 65})
-    ctx["radon"] = run_radon(code_dir, cfg)
+    radon = ctx["radon"] = run_radon(code_dir, cfg, files=ctx.get("py_files"), digests=ctx.get("digests"))
+    files = radon.get("files") or []
+    # normalize once so the hot paths below and in scoring/compare skip float()
+    for f in files:
+        f["mi"] = float(f.get("mi", 0.0))
+        f["cc_avg"] = float(f.get("cc_avg", 0.0))
+    # worst-first ranking for step_llm_refactor; kept in ctx, not in radon,
+    # so it never reaches the result dict, the reports or the compare payload
+    ctx["radon_ranked_idx"] = sorted(range(len(files)), key=lambda i: _rank_key(files[i]))
     return ctx
 
 def step_pylint(ctx: dict) -> dict:
@@ -127,98 +176,220 @@ def step_pylint(ctx: dict) -> dict:
     if agent and hasattr(agent, "log"):
         agent.log("Step 2: Pylint")
     code_dir: Path = ctx["code_dir"]
-    ctx["pylint"] = run_pylint(code_dir)
+    ctx["pylint"] = run_pylint(code_dir, jobs=0, files=ctx.get("py_files"),  # 0 -> pylint picks cpu count
+                               digests=ctx.get("digests"))
+    return ctx
+
+def step_static_analysis(ctx: dict) -> dict:
+    """radon and pylint are independent, so run them side by side"""
+    if ctx.get("py_files") is not None and "digests" not in ctx:
+        # one manifest pass for both analyzers; unchanged files aren't re-read
+        ctx["digests"] = file_digests(ctx["code_dir"], ctx["py_files"])
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_radon = ex.submit(step_radon, ctx)
+        f_pylint = ex.submit(step_pylint, ctx)
+        f_radon.result()
+        f_pylint.result()
     return ctx
 
+# refactor prompt pieces, shared by the single-file and batched calls
+_REFACTOR_PREAMBLE = """You are a senior Python code reviewer.
+ONLY use the provided code; do not invent functions/identifiers."""
+
+_REFACTOR_TASK = """Your task: Provide **3–5 specific and actionable refactoring suggestions**
+- reference exact function/lines from the snippet,
+- say WHY (impact on readability/complexity/testability/perf),
+- keep it actionable (rename/extract/inline/guard/diff).
+If nothing actionable: return a single bullet "No meaningful refactor".
+Focus only on code improvements.
+Do not ask questions. Do not request clarification."""
+
+@lru_cache(maxsize=64)
+def _line_offsets(path: str, mtime_ns: int, size: int) -> Tuple[int, ...]:
+    """byte offset of each line start plus EOF; mtime/size in the key retire stale entries"""
+    offsets = [0]
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = mm.find(b"\n")
+        while pos != -1:
+            offsets.append(pos + 1)
+            pos = mm.find(b"\n", pos + 1)
+    if offsets[-1] != size:
+        offsets.append(size)  # last line has no trailing newline
+    return tuple(offsets)
+
+def _read_lines(path: Path, start: int, end: int) -> str:
+    """0-based lines [start, end) of a file, mapping only that byte range"""
+    st = path.stat()
+    if st.st_size == 0:
+        return ""  # mmap refuses empty files
+    off = _line_offsets(str(path), st.st_mtime_ns, st.st_size)
+    start, end = max(0, start), min(end, len(off) - 1)
+    if start >= end:
+        return ""
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        raw = mm[off[start]:off[end]]
+    return "\n".join(raw.decode("utf-8", errors="ignore").splitlines())
+
+def _refactor_context(file_data: Dict[str, Any], code_root: Path) -> str:
+    """file header, hotspot list and snippets of the top 2 hotspots"""
+    path, mi, cc_avg = file_data["path"], file_data.get("mi", 0.0), file_data.get("cc_avg", 0.0)
+
+    hotspots = [i for i in file_data.get("cc_items", []) if float(i.get("cc", 0)) > 10]
+    hotspot_text = ", ".join(f"{i.get('name', '?')} (cc={i.get('cc')}) lines {i.get('line')}-{i.get('end')}"
+                             for i in hotspots) or "none"
+
+    snippets = []
+    if code_root.exists():
+        try:
+            src = code_root / path
+            for i in sorted(hotspots, key=lambda x: float(x.get("cc", 0)), reverse=True)[:2]:
+                start = int(i.get("line", 1)) - 1
+                end = int(i.get("end", start + 20))
+                excerpt = _read_lines(src, start, end)
+                if excerpt.strip():
+                    snippets.append(f"# {i.get('name', '?')} (cc={i.get('cc')})\n```python\n{excerpt}\n```")
+        except Exception:
+            pass
+
+    snippet_text = "\n\n".join(snippets) or "No code snippet available."
+    return f"File: {path} | MI: {mi} | CC_avg: {cc_avg}\nHotspots: {hotspot_text}\n\n{snippet_text}"
+
+# one non-empty line per bullet, leading "-"/"•" markers and padding dropped
+_BULLET_RE = re.compile(r"^[ \t]*[-• \t]*([^-•\s].*?)[ \t\r]*$", re.M)
+
+def _parse_bullets(text: str) -> List[str]:
+    bullets = _BULLET_RE.findall(text)
+    return bullets[:5] if bullets else [text.strip()]
+
+# LLM replies are cached on disk for a week, keyed by agent + model + prompt.
+# The prompt embeds the code snippets, so edited files miss automatically.
+_LLM_CACHE_TTL = 7 * 86400
+_LLM_ERROR_PREFIXES = ("LLM error:", "OpenAI error:", "LLM unavailable")
+# fallbacks the flow itself puts in place of a reply (refactor bullet / comparison markdown)
+_LLM_FALLBACK_PREFIXES = ("LLM response could not be retrieved", "_(LLM error:", "_LLM comparison unavailable")
+
+def is_llm_failure(text: Any) -> bool:
+    """True for an idea bullet or summary that stands in for a failed LLM call (worth retrying later)"""
+    return isinstance(text, str) and text.lstrip().startswith(_LLM_ERROR_PREFIXES + _LLM_FALLBACK_PREFIXES)
+
+def _llm_cache_key(agent: Any, *parts: str) -> Optional[str]:
+    model = getattr(agent, "model", None)
+    if not model or os.getenv("CODEINSIGHT_LLM_CACHE", "1") == "0":
+        return None  # NullAgent & co. have nothing worth caching
+    h = hashlib.sha256(f"{type(agent).__name__}:{model}".encode("utf-8"))
+    for p in parts:
+        h.update(b"\0" + p.encode("utf-8"))
+    return h.hexdigest()
+
+def _cached_reply(agent: Any, prompt: str) -> Optional[str]:
+    """the cached single-prompt reply, None if there is none (or caching is off)"""
+    key = _llm_cache_key(agent, prompt)
+    hit = cache_store.load("llm", key, max_age=_LLM_CACHE_TTL) if key else None
+    return hit if isinstance(hit, str) else None
+
+def _cached_generate(agent: Any, prompt: str) -> str:
+    hit = _cached_reply(agent, prompt)
+    if hit is not None:
+        return hit
+    key = _llm_cache_key(agent, prompt)
+    text = agent.generate(prompt=prompt)
+    # agents report failures as text; don't pin those for a week
+    if key and text and not text.startswith(_LLM_ERROR_PREFIXES):
+        cache_store.save("llm", key, text)
+    return text
+
+def _cached_generate_batch(agent: Any, prompts: List[str], instructions: str) -> List[str]:
+    key = _llm_cache_key(agent, instructions, *prompts)
+    if key:
+        hit = cache_store.load("llm", key, max_age=_LLM_CACHE_TTL)
+        if isinstance(hit, list) and len(hit) == len(prompts):
+            return hit
+    texts = agent.generate_batch(prompts, instructions=instructions)  # raises on bad replies
+    if key:
+        cache_store.save("llm", key, texts)
+    return texts
+
 def step_llm_refactor(ctx):
     agent = ctx.get("agent")
     top_n = int(ctx.get("llm_top_n", 3))
     code_root = Path(ctx.get("code_dir", ""))
 
-    # Get worst files by complexity
-    radon_files = ctx.get("radon", {}).get("files", [])
-    worst_files = sorted(radon_files,
-                         key=lambda f: (-float(f.get("cc_avg", 0)), float(f.get("mi", 999))))[:top_n]
+    # Get worst files by complexity, already-simple files never make the cut
+    worst_files = [f for f in _ranked_files(ctx.get("radon", {}), idx=ctx.get("radon_ranked_idx"))
+                   if not (f.get("mi", 0.0) > 85.0 and f.get("cc_avg", 0.0) < 2.0)][:top_n]
+    if not worst_files:
+        ctx["refactor_ideas"] = {}
+        return ctx
+
+    # No agent fallback: answer before touching any file (NullAgent has generate() but no LLM)
+    if not agent or not hasattr(agent, "generate") or isinstance(agent, NullAgent):
+        static = ["Split large functions into smaller helpers.",
+                  "Simplify conditional branches; use early returns.",
+                  "Extract repeated code into shared helpers."]
+        ctx["refactor_ideas"] = {f["path"]: list(static) for f in worst_files}
+        return ctx
+
+    def single_prompt(file_data):
+        return (f"{_REFACTOR_PREAMBLE}\n{_refactor_context(file_data, code_root)}\n\n"
+                f"{_REFACTOR_TASK}\nOutput only bullet points with clear suggestions.")
 
     def get_refactor_ideas(file_data):
-        path, mi, cc_avg = file_data["path"], float(file_data.get("mi", 0)), float(file_data.get("cc_avg", 0))
-
-        # Skip simple files
-        if mi > 85.0 and cc_avg < 2.0:
-            return ["No meaningful refactor; file is already simple. Consider adding CLI tests or docs."]
-
-        # No agent fallback
-        if not agent or not hasattr(agent, "generate"):
-            return ["Split large functions into smaller helpers.",
-                    "Simplify conditional branches; use early returns.",
-                    "Extract repeated code into shared helpers."]
-
-        # Build prompt with hotspots
-        hotspots = [i for i in file_data.get("cc_items", []) if float(i.get("cc", 0)) > 10]
-        hotspot_text = ", ".join(f"{i.get('name', '?')} (cc={i.get('cc')}) lines {i.get('line')}-{i.get('end')}"
-                                 for i in hotspots) or "none"
-
-        # Get code snippets for top 2 hotspots
-        snippets = []
-        if code_root.exists():
-            try:
-                file_text = (code_root / path).read_text(encoding="utf-8", errors="ignore")
-                lines = file_text.splitlines()
-                for i in sorted(hotspots, key=lambda x: float(x.get("cc", 0)), reverse=True)[:2]:
-                    start, end = int(i.get("line", 1)) - 1, int(i.get("end", start + 20))
-                    excerpt = "\n".join(lines[start:min(end, len(lines))])
-                    if excerpt.strip():
-                        snippets.append(f"# {i.get('name', '?')} (cc={i.get('cc')})\n```python\n{excerpt}\n```")
-            except Exception:
-                pass
-
-        snippet_text = "\n\n".join(snippets) or "No code snippet available."
-
-        prompt = f"""You are a senior Python code reviewer.\n
-                ONLY use the provided code; do not invent functions/identifiers.
-File: {path} | MI: {mi} | CC_avg: {cc_avg}
-Hotspots: {hotspot_text}
-
-{snippet_text}
-
-Your task: Provide **3–5 specific and actionable refactoring suggestions**\n 
-            - reference exact function/lines from the snippet,\n
-            - say WHY (impact on readability/complexity/testability/perf),\n
-            - keep it actionable (rename/extract/inline/guard/diff).\n
-            If nothing actionable: return a single bullet "No meaningful refactor".
-            as bullet points. Focus only on code improvements. 
-            Do not ask questions. Do not request clarification. 
-            Output only bullet points with clear suggestions."""
-
         try:
-            response = agent.generate(prompt=prompt)
-            bullets = [line.strip("-• ").strip() for line in response.splitlines() if line.strip()]
-            return bullets[:5] if bullets else [response.strip()]
+            return _parse_bullets(_cached_generate(agent, single_prompt(file_data)))
         except Exception:
             return ["LLM response could not be retrieved; showing static suggestions."]
 
-    ctx["refactor_ideas"] = {f["path"]: get_refactor_ideas(f) for f in worst_files}
+    # files answered by an earlier per-file call skip the batch: otherwise a model that
+    # never manages the batch JSON costs a failed round trip on every warm run
+    ideas_map: Dict[str, List[str]] = {}
+    for f in worst_files:
+        hit = _cached_reply(agent, single_prompt(f))
+        if hit is not None:
+            ideas_map[f["path"]] = _parse_bullets(hit)
+    llm_files = [f for f in worst_files if f["path"] not in ideas_map]
+
+    # one round trip (and one copy of the instructions) for all files when the agent can batch
+    if len(llm_files) > 1 and hasattr(agent, "generate_batch"):
+        try:
+            texts = _cached_generate_batch(
+                agent,
+                [_refactor_context(f, code_root) for f in llm_files],
+                f"{_REFACTOR_PREAMBLE}\nApply the task below to each file separately.\n{_REFACTOR_TASK}",
+            )
+            for f, text in zip(llm_files, texts):
+                ideas_map[f["path"]] = _parse_bullets(text)
+            llm_files = []
+        except Exception:
+            pass  # fall back to one call per file
+
+    # per-file calls overlap on the server instead of waiting on each other
+    if llm_files:
+        workers = max(1, min(len(llm_files), int(os.getenv("CODEINSIGHT_LLM_CONCURRENCY", "4"))))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {ex.submit(get_refactor_ideas, f): f["path"] for f in llm_files}
+            for fut, path in futures.items():
+                ideas_map[path] = fut.result()
+
+    # keep worst-first order
+    ctx["refactor_ideas"] = {f["path"]: ideas_map[f["path"]] for f in worst_files}
     return ctx
 
+_RADON_COUNTS = itemgetter("files", "mi_warnings", "cc_hotspots")
+_RADON_COUNT_DEFAULTS = {"files": 0, "mi_warnings": 0, "cc_hotspots": 0}
+
 def step_merge(ctx: Dict[str, Any]) -> Dict[str, Any]:
     agent = ctx.get("agent")
     if agent and hasattr(agent, "log"):
         agent.log("Step 3: Merge Results")
 
     radon = ctx["radon"]; pylint = ctx["pylint"]
-    files = int((radon.get("summary") or {}).get("files", 0))
-    mi_avg = _avg_mi({"radon": radon})
-    cc_avg = _avg_cc({"radon": radon})
+    files, mi_warn, cc_hot = _RADON_COUNTS({**_RADON_COUNT_DEFAULTS, **(radon.get("summary") or {})})
     pylint_total = int((pylint.get("summary") or {}).get("total", 0))
 
-    issues_total = (
-            pylint_total
-            + int((radon.get("summary") or {}).get("mi_warnings", 0))
-            + int((radon.get("summary") or {}).get("cc_hotspots", 0))
-    )
+    issues_total = pylint_total + int(mi_warn) + int(cc_hot)
 
     ctx["result"] = {
-        "files_scanned": int(radon["summary"]["files"]),
+        "files_scanned": int(files),
         "issues_found": issues_total,
         "summary": "Pylint + Radon via ADK flow",
         "adk_message": "Workflow completed successfully",
@@ -230,19 +401,26 @@ def step_merge(ctx: Dict[str, Any]) -> Dict[str, Any]:
 
 # comparison helpers
 def _top_hotspots(res: Dict[str, Any], top: int = 5) -> List[Dict[str, Any]]:
-    files = (res.get("radon") or {}).get("files") or []
-    ranked = sorted(files, key=lambda f: (-float(f.get("cc_avg", 0.0)), float(f.get("mi", 999))))
-    return [{"file": f["path"], "mi": round(float(f.get("mi",0)),1), "cc_avg": round(float(f.get("cc_avg",0)),1)} for f in ranked[:top]]
+    ranked = _ranked_files(res.get("radon") or {}, limit=top)
+    return [{"file": f["path"], "mi": round(f.get("mi", 0.0), 1), "cc_avg": round(f.get("cc_avg", 0.0), 1)} for f in ranked]
+
+_COMPARE_METRICS = ("quality_score", "issues_found", "files_scanned", "pylint_total", "mi_avg", "cc_avg")
+
+def _summarize(res: Dict[str, Any]) -> Dict[str, Any]:
+    """all comparison metrics for one result, radon means computed once"""
+    mi, cc = _radon_means(res.get("radon", {}) or {})
+    return {
+        "quality_score": float(res.get("quality_score", 0)),
+        "issues_found": int(res.get("issues_found", 0)),
+        "files_scanned": int(res.get("files_scanned", 0)),
+        "pylint_total": _pylint_total(res),
+        "mi_avg": round(mi, 2),
+        "cc_avg": round(cc, 2),
+    }
 
 def build_compare_payload(res_a: Dict[str, Any], res_b: Dict[str, Any]) -> Dict[str, Any]:
-    rows = [
-        {"metric":"quality_score", "A":float(res_a.get("quality_score",0)), "B":float(res_b.get("quality_score",0))},
-        {"metric":"issues_found",  "A":int(res_a.get("issues_found",0)),    "B":int(res_b.get("issues_found",0))},
-        {"metric":"files_scanned", "A":int(res_a.get("files_scanned",0)),   "B":int(res_b.get("files_scanned",0))},
-        {"metric":"pylint_total",  "A":_pylint_total(res_a),                "B":_pylint_total(res_b)},
-        {"metric":"mi_avg",        "A":_avg_mi(res_a),                      "B":_avg_mi(res_b)},
-        {"metric":"cc_avg",        "A":_avg_cc(res_a),                      "B":_avg_cc(res_b)},
-    ]
+    sum_a, sum_b = _summarize(res_a), _summarize(res_b)
+    rows = [{"metric": m, "A": sum_a[m], "B": sum_b[m]} for m in _COMPARE_METRICS]
     # delta + better
     better_high = {"quality_score","mi_avg"}
     for r in rows:
@@ -269,6 +447,7 @@ def _build_adk_flow(steps: Iterable, agent: Any):
         def process(self, ctx):   # some builds call .process()
             return self.fn(ctx)
 
+    SingleFlow = _adk_single_flow()
     procs = [_FnProc(s) for s in steps]
     flow = SingleFlow()  # type: ignore[call-arg]
 
@@ -301,25 +480,39 @@ def _build_adk_flow(steps: Iterable, agent: Any):
 
 
 # Analyze with adk workflow
-def run_analysis_with_adk_flow(code_dir: Path, radon_config: Dict[str, Any] | None = None) -> Dict[str, Any]:
-    """always returns a JSON-friendly dict the UI understands"""
+def run_analysis_with_adk_flow(code_dir: Path, radon_config: Dict[str, Any] | None = None,
+                               py_files: Iterable[Path] | None = None,
+                               settings: Mapping[str, Optional[str]] | None = None) -> Dict[str, Any]:
+    """
+    always returns a JSON-friendly dict the UI understands
+    py_files: .py files already discovered under code_dir, shared by radon and pylint
+    settings: snapshot of the agent/ADK env vars; os.environ (read now) when omitted
+    """
     code_dir = Path(code_dir)
-    agent = get_agent_from_env()
-    mode = (os.getenv("CODEINSIGHT_AGENT") or "ollama").lower()
+    if py_files is None:
+        py_files = tuple(code_dir.rglob("*.py"))
+    if settings is None:
+        settings = os.environ
+    adk_flag = settings.get("CODEINSIGHT_USE_ADK")
+    use_adk = USE_ADK if adk_flag is None else adk_flag == "1"
+    agent = get_agent(settings)
+    mode = (settings.get("CODEINSIGHT_AGENT") or "ollama").lower()
     llm_enabled = mode != "none" and hasattr(agent, "generate")
 
     ctx: Dict[str, Any] = {
         "agent": agent,
         "code_dir": code_dir,
         "radon_config": radon_config or {"complexity_threshold": 10, "maintainability_threshold": 65},
+        "py_files": tuple(py_files),
         "llm_top_n": 3,
         "llm_enabled": llm_enabled,
     }
 
-    steps = [step_radon, step_pylint, step_llm_refactor, step_merge]
+    steps = [step_static_analysis, step_llm_refactor, step_merge]
 
-    # Prefer ADK if requested and available
-    if USE_ADK and ADK_OK and SingleFlow is not None:
+    # Prefer ADK if requested and available (only then is google-adk imported)
+    adk_ok = use_adk and _adk_single_flow() is not None
+    if adk_ok:
         try:
             if hasattr(agent, "log"):
                 agent.log("Building Google-ADK SingleFlow...")
@@ -339,9 +532,9 @@ def run_analysis_with_adk_flow(code_dir: Path, radon_config: Dict[str, Any] | No
     for step in steps:
         ctx = step(ctx)
     res = ctx["result"]
-    if USE_ADK and not ADK_OK:
+    if use_adk and not adk_ok:
         res["adk_message"] = "Google-ADK not found; ran manual flow"
-    elif not USE_ADK:
+    elif not use_adk:
         res["adk_message"] = "ADK disabled; ran manual flow"
     return res
 
@@ -358,10 +551,12 @@ def _get_agent():
         except Exception:
             return None
 
-def summarize_comparison_with_llm(res_a: dict, res_b: dict, cmp: dict) -> str:
+def summarize_comparison_with_llm(res_a: dict, res_b: dict, cmp: dict,
+                                  settings: Mapping[str, Optional[str]] | None = None) -> str:
     """
     Builds a compact markdown summary via the selected agent (Ollama/OpenAI),
     falling back to a templated string.
+    settings: same env snapshot as run_analysis_with_adk_flow
     """
     # Build model-friendly prompt for comparison
     metrics = cmp.get("metrics", [])
@@ -380,7 +575,7 @@ def summarize_comparison_with_llm(res_a: dict, res_b: dict, cmp: dict) -> str:
         5) Do **not** include tables or code blocks. Keep under 280 words."""
     )
 
-    agent = get_agent_from_env()
+    agent = get_agent(os.environ if settings is None else settings)
     if not agent:
         # non-LLM fallback
         bullets = [
@@ -1,16 +1,36 @@
 import os
+from functools import lru_cache
+
+# env vars the agents read; the cached instance is reused while these stay the same
+_AGENT_ENV = (
+    "CODEINSIGHT_AGENT",
+    "CODEINSIGHT_OLLAMA_MODEL", "OLLAMA_MODEL",
+    "OPENAI_MODEL", "OPENAI_API_KEY", "OPENAI_BASE_URL",
+)
 
 def get_agent_from_env():
     """
     Return an agent with a .generate(prompt) method based on CODEINSIGHT_AGENT.
     Supported values: "ollama", "openai", "none".
+    The same instance (and its HTTP client) is shared until the env changes.
+    """
+    return get_agent(os.environ)
+
+def get_agent(settings):
     """
-    mode = (os.getenv("CODEINSIGHT_AGENT") or "ollama").lower()
+    Same as get_agent_from_env, but from a snapshot of those env vars (a mapping).
+    Background runs use this so a sidebar change mid-run can't switch their agent.
+    """
+    return _agent_for_env(tuple(settings.get(k) for k in _AGENT_ENV))
+
+@lru_cache(maxsize=1)
+def _agent_for_env(env: tuple):
+    mode = (env[0] or "ollama").lower()
 
     if mode == "openai":
         try:
             from .openai_agent import OpenAIAgent
-            return OpenAIAgent()
+            return OpenAIAgent(model=env[3] or OpenAIAgent.DEFAULT_MODEL)
         except Exception:
             from .null_agent import NullAgent
             return NullAgent(reason="OpenAI agent not available")
@@ -22,7 +42,8 @@ def get_agent_from_env():
     # default: ollama (if you don’t have an Ollama agent yet, this falls back to NullAgent)
     try:
         from .ollama_agent import OllamaAgent  # optional; if you already have it
-        return OllamaAgent()
+        # model resolved here, not in the agent, so it comes from the snapshot
+        return OllamaAgent(model=env[1] or env[2] or OllamaAgent.DEFAULT_MODEL)
     except Exception:
         from .null_agent import NullAgent
         return NullAgent(reason="Ollama agent not available; falling back")
\ No newline at end of file
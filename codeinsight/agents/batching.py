@@ -0,0 +1,40 @@
+from __future__ import annotations
+import json
+from typing import List
+
+
+def build_batch_prompt(prompts: List[str], instructions: str = "") -> str:
+    """packs several prompts into one, each tagged [file1]..[fileN]"""
+    blocks = "\n\n".join(f"[file{i}]\n{p}" for i, p in enumerate(prompts, 1))
+    keys = ", ".join(f'"file{i}": ["..."]' for i in range(1, len(prompts) + 1))
+    head = f"{instructions.strip()}\n\n" if instructions else ""
+    return (
+        f"{head}{blocks}\n\n"
+        "Answer every [fileN] block separately.\n"
+        f"Respond in JSON only, one list of bullet strings per block: {{{keys}}}"
+    )
+
+
+def parse_batch_response(text: str, n: int) -> List[str]:
+    """
+    splits a batched JSON reply back into n answers (bullets joined by newlines)
+    raises ValueError when the reply doesn't have the expected shape
+    """
+    raw = (text or "").strip()
+    # models like to wrap the object in ```json fences or add a preface
+    start, end = raw.find("{"), raw.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("no JSON object in batch response")
+    data = json.loads(raw[start:end + 1])  # JSONDecodeError is a ValueError
+    if not isinstance(data, dict):
+        raise ValueError("batch response is not a JSON object")
+
+    out = []
+    for i in range(1, n + 1):
+        v = data.get(f"file{i}")
+        if v is None:
+            raise ValueError(f"file{i} missing from batch response")
+        if isinstance(v, list):
+            v = "\n".join(f"- {x}" for x in v)
+        out.append(str(v))
+    return out
@@ -1,26 +1,69 @@
+from __future__ import annotations
+import json
+import os
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from .batching import build_batch_prompt, parse_batch_response
 
 class OllamaAgent:
     """provides .generate(prompt) so step_llm_refactor can call it"""
 
-    def __init__(self, model: str = "llama3.1:8b", host: str = "http://localhost:11434"):
-        self.model = model
+    # 4-bit quant: about half the memory and faster decoding than the fp16 default tag,
+    # and refactor bullets don't need more precision than that
+    DEFAULT_MODEL = "llama3.1:8b-instruct-q4_K_M"
+
+    def __init__(self, model: str | None = None, host: str = "http://localhost:11434"):
+        self.model = (model or os.getenv("CODEINSIGHT_OLLAMA_MODEL")
+                      or os.getenv("OLLAMA_MODEL") or self.DEFAULT_MODEL)
         self.url = f"{host}/api/generate"
+        # keep-alive pool shared by all calls (and threads) on this agent
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _stream(self, payload: dict) -> str:
+        """
+        posts with stream=True and joins the NDJSON chunks; raises on transport/model errors
+        the 120 s timeout is per read, so a long answer is fine as long as tokens keep coming
+        """
+        # stream NDJSON chunks so we read while the model is still decoding
+        with self._session.post(
+            self.url,
+            json={"model": self.model, **payload, "stream": True},
+            timeout=120,
+            stream=True,
+        ) as resp:
+            resp.raise_for_status()
+            parts = []
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                parts.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    break
+        return "".join(parts).strip()
 
     def generate(self, prompt: str) -> str:
         try:
-            resp = requests.post(
-                self.url,
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=120,
-            )
-            print("--------",resp.__dict__)
-            resp.raise_for_status()
-            data = resp.json()
-            return data.get("response", "").strip()
+            return self._stream({"prompt": prompt})
         except Exception as e:
             return f"LLM error: {e}"
 
+    def generate_batch(self, prompts: list[str], instructions: str = "") -> list[str]:
+        """
+        one request for several prompts, answers come back in the same order
+        streamed like generate: a multi-file answer on a slow model outlasts one 120 s read
+        raises on transport errors or an unparsable reply so the caller can fall back
+        """
+        text = self._stream({"prompt": build_batch_prompt(prompts, instructions), "format": "json"})
+        return parse_batch_response(text, len(prompts))
+
     def log(self, msg: str) -> None:
         # no-op just for compatibility
         print(f"[OllamaAgent] ")
\ No newline at end of file
@@ -1,6 +1,9 @@
 from __future__ import annotations
 import os
-from typing import Optional
+import threading
+from typing import List, Optional
+
+from .batching import build_batch_prompt, parse_batch_response
 
 class OpenAIAgent:
     """
@@ -9,29 +12,42 @@ class OpenAIAgent:
     - Uses Chat Completions API
     """
 
+    DEFAULT_MODEL = "gpt-4o-mini"
+
     def __init__(self, model: Optional[str] = None, system: Optional[str] = None):
-        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self.model = model or os.getenv("OPENAI_MODEL", self.DEFAULT_MODEL)
         self.system = system or "You are a senior Python reviewer."
 
+        # client (and the openai import) is created on the first generate call
+        self._client = None
+        self._err: Optional[str] = None
+        self._ready = False
+        self._lock = threading.Lock()  # per-file LLM calls may race on the first use
+
+    def _get_client(self):
+        with self._lock:
+            if not self._ready:
+                self._client = self._create_client()
+                self._ready = True
+        return self._client
+
+    def _create_client(self):
         # Lazy import to keep your app fast & optional
         try:
             from openai import OpenAI  # fka openai>=1.x
         except Exception:
-            self._client = None
             self._err = "openai SDK not installed"
-            return
+            return None
 
         api_key = os.getenv("OPENAI_API_KEY", "")
         base_url = os.getenv("OPENAI_BASE_URL")  # optional; leave empty for api.openai.com
 
         if not api_key:
-            self._client = None
             self._err = "OPENAI_API_KEY is not set"
-            return
+            return None
 
         # Create client
-        self._client = OpenAI(api_key=api_key, base_url=base_url)
-        self._err = None
+        return OpenAI(api_key=api_key, base_url=base_url)
 
     def log(self, message: str):
         # no-op hook for your flow’s logging
@@ -42,13 +58,14 @@ class OpenAIAgent:
         Return a short suggestion text string.
         On any configuration/API error, return a safe fallback string.
         """
-        if not self._client:
+        client = self._get_client()
+        if not client:
             # keep the pipeline alive when the key or SDK is missing
             return "LLM unavailable; showing static suggestions."
 
         try:
             # Chat Completions API (stable & documented)
-            resp = self._client.chat.completions.create(
+            resp = client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": self.system},
@@ -60,4 +77,26 @@ class OpenAIAgent:
             return (resp.choices[0].message.content or "").strip()
         except Exception as e:
             # never crash the UI
-            return f"OpenAI error: {e}"
\ No newline at end of file
+            return f"OpenAI error: {e}"
+
+    def generate_batch(self, prompts: List[str], instructions: str = "") -> List[str]:
+        """
+        One chat completion for several prompts; answers keep the input order.
+        Raises when the client is missing or the reply can't be split, so the
+        caller can fall back to per-prompt generate().
+        """
+        client = self._get_client()
+        if not client:
+            raise RuntimeError(self._err or "OpenAI client unavailable")
+
+        resp = client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system},
+                {"role": "user", "content": build_batch_prompt(prompts, instructions)},
+            ],
+            temperature=0.2,
+            max_tokens=400 * len(prompts),  # same budget per prompt as generate()
+            response_format={"type": "json_object"},  # reply must parse as the [fileN] map
+        )
+        return parse_batch_response(resp.choices[0].message.content or "", len(prompts))
@@ -1,6 +1,14 @@
 from __future__ import annotations
 from pathlib import Path
 import io, json, sys, subprocess
+from collections import Counter
+import hashlib
+import os
+from typing import Iterable, Mapping
+
+from codeinsight.cache import store as cache_store
+from codeinsight.cache.hashing import hash_file
+from codeinsight.cache.manifest import file_digests
 
 try:
     from pylint.reporters.json_reporter import JSONReporter  # 2.0+
@@ -15,6 +23,17 @@ try:
 except ImportError:
     PylintRun = None
 
+try:
+    from pylint import __version__ as PYLINT_VERSION
+except ImportError:
+    PYLINT_VERSION = "unknown"
+
+# messages depend on pylint's version and the options passed below; bump the suffix when those change
+_CACHE_NS = f"pylint-{PYLINT_VERSION}-3"
+
+# files pylint may read its options from; their content is part of every cache key
+_CONFIG_FILES = ("pylintrc", ".pylintrc", "pyproject.toml", "setup.cfg", "tox.ini")
+
 
 def _run_pylint_api(args: list[str], reporter: JSONReporter) -> bool:
     """runs pylint using API with fallback compatibility"""
@@ -49,70 +68,152 @@ def _run_pylint_api(args: list[str], reporter: JSONReporter) -> bool:
                 return False
 
 
-def _run_pylint_subprocess(files: list[str]) -> dict:
-    """runs pylint via subprocess"""
+def _run_pylint_subprocess(files: list[str], jobs: int | None = 0) -> list[dict] | None:
+    """runs pylint via subprocess, --jobs=0 lets pylint use every core; None if it failed"""
+    args = ['--output-format=json', '--overgeneral-exceptions=BaseException,Exception']
+    if jobs is not None:
+        args.append(f'--jobs={jobs}')
     try:
         result = subprocess.run(
-            ['pylint'] + files + ['--output-format=json', '--overgeneral-exceptions=BaseException,Exception'],
+            ['pylint'] + files + args,
             capture_output=True,
             text=True,
             timeout=120  # 2 minute timeout
         )
 
         if result.stdout.strip():
-            msgs = json.loads(result.stdout)
-            by_type = {}
-            for m in msgs:
-                t = m.get("type") or m.get("category") or "unknown"
-                by_type[t] = by_type.get(t, 0) + 1
-
-            return {
-                "summary": {"total": len(msgs), "by_type": by_type},
-                "messages": msgs,
-            }
+            return json.loads(result.stdout)
     except (subprocess.TimeoutExpired, FileNotFoundError, json.JSONDecodeError):
         pass
     except Exception:
         pass
 
-    return {"summary": {"total": 0, "by_type": {}}, "messages": []}
+    return None
 
 
-def run_pylint(code_dir: Path) -> dict:
-    """
-    runs pylint analysis on Python files in the given directory
-    uses API method first, falls back to subprocess if needed
-    """
-
-    files = [str(p) for p in Path(code_dir).rglob("*.py")]
-
-    if not files:
-        return {"summary": {"total": 0, "by_type": {}}, "messages": []}
-
+def _lint_messages(files: list[str], jobs: int | None = None) -> list[dict] | None:
+    """raw pylint messages for files: API first, subprocess fallback; None if both failed"""
     if JSONReporter is not None:
         buf = io.StringIO()
         reporter = JSONReporter(output=buf)
         args = [*files, "--output-format=json"]
+        if jobs is not None:
+            args.append(f"--jobs={jobs}")
 
         if _run_pylint_api(args, reporter):
             raw = buf.getvalue().strip()
 
             if raw:
                 try:
-                    msgs = json.loads(raw)
-                    by_type = {}
-                    for m in msgs:
-                        t = m.get("type") or m.get("category") or "unknown"
-                        by_type[t] = by_type.get(t, 0) + 1
-
-                    return {
-                        "summary": {"total": len(msgs), "by_type": by_type},
-                        "messages": msgs,
-                    }
+                    return json.loads(raw)
                 except json.JSONDecodeError:
                     pass
 
-    return _run_pylint_subprocess(files)
+    return _run_pylint_subprocess(files, jobs=0 if jobs is None else jobs)
+
+
+def _pylint_result(msgs: list[dict]) -> dict:
+    by_type = Counter(m.get("type") or m.get("category") or "unknown" for m in msgs)
+
+    return {
+        "summary": {"total": len(msgs), "by_type": dict(by_type)},
+        "messages": msgs,
+    }
+
+
+def _config_fingerprint(code_dir: Path) -> str:
+    """digest of the pylint config files in code_dir and the cwd (where pylint looks)"""
+    h = hashlib.sha256()
+    for d in dict.fromkeys((Path(code_dir).resolve(), Path.cwd().resolve())):
+        for name in _CONFIG_FILES:
+            try:
+                digest = hash_file(d / name)
+            except OSError:
+                continue
+            h.update(f"{d / name}\0{digest}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _relpath(path: str, code_dir: Path) -> str:
+    return os.path.relpath(path, code_dir).replace(os.sep, "/")
+
+
+def _lint_set_fingerprint(files: list[str], code_dir: Path, digests: Mapping[str, str]) -> str:
+    """
+    digest of every file in the lint set
+    a file's messages depend on its neighbours too (import-error, no-name-in-module,
+    inferred no-member, duplicate-code), so any change in the set invalidates all entries
+    """
+    h = hashlib.sha256()
+    for rel, digest in sorted((_relpath(f, code_dir), digests.get(f, "")) for f in files):
+        h.update(f"{rel}\0{digest}\0".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _cache_key(path: str, code_dir: Path, digest: str, config_fp: str, set_fp: str) -> str:
+    """file content + its place in the project (module names / naming checks depend on it) + config + lint set"""
+    h = hashlib.sha256(_relpath(path, code_dir).encode("utf-8"))
+    for part in (digest, config_fp, set_fp):
+        h.update(b"\0")
+        h.update(part.encode("ascii"))
+    return h.hexdigest()
+
+
+def run_pylint(code_dir: Path, jobs: int | None = None, files: Iterable[Path] | None = None,
+               digests: Mapping[str, str] | None = None) -> dict:
+    """
+    runs pylint analysis on Python files in the given directory
+    uses API method first, falls back to subprocess if needed
+    jobs: forwarded as --jobs (0 = one worker per cpu), None keeps pylint's default
+    files: pre-discovered .py paths (saves a second tree walk), rglob when omitted
+    digests: path -> content digest from the manifest, computed here when omitted
+    files whose content was linted before (same config, same set of files around them)
+    are served from the on-disk cache, only the rest go through pylint
+    """
+
+    code_dir = Path(code_dir)
+    files = [str(p) for p in (files if files is not None else code_dir.rglob("*.py"))]
+
+    if not files:
+        return _pylint_result([])
+
+    if digests is None:
+        digests = file_digests(code_dir, files)
+    config_fp = _config_fingerprint(code_dir)
+    set_fp = _lint_set_fingerprint(files, code_dir, digests)
+    keys = {f: _cache_key(f, code_dir, digests[f], config_fp, set_fp) for f in files if f in digests}
+    per_file: dict[str, list[dict]] = {}
+    for f, key in keys.items():
+        hit = cache_store.load(_CACHE_NS, key)
+        if isinstance(hit, list):
+            per_file[f] = [{**m, "path": f} for m in hit]
+
+    changed = [f for f in files if f not in per_file]
+    # messages we can't pin to an input file (config / command-line ones) belong to the
+    # whole lint set, so they're cached under a set-level key next to the per-file entries
+    orphans_key = hashlib.sha256(f"orphans\0{config_fp}\0{set_fp}".encode("ascii")).hexdigest()
+    fresh = _lint_messages(changed, jobs) if changed else None
+    if fresh is None:  # all cached, or pylint failed (never cached as "no messages")
+        hit = cache_store.load(_CACHE_NS, orphans_key)
+        orphans: list[dict] = hit if isinstance(hit, list) else []
+    else:
+        orphans = []
+        by_abs = {os.path.abspath(f): f for f in changed}
+        grouped: dict[str, list[dict]] = {f: [] for f in changed}
+        for m in fresh:
+            f = by_abs.get(os.path.abspath(m.get("path") or ""))
+            if f is None:
+                orphans.append(m)
+            else:
+                grouped[f].append({**m, "path": f})
+        for f, msgs in grouped.items():
+            if f in keys:
+                cache_store.save(_CACHE_NS, keys[f], [{k: v for k, v in m.items() if k != "path"} for m in msgs])
+        cache_store.save(_CACHE_NS, orphans_key, orphans)
+        per_file.update(grouped)
+
+    msgs = [m for f in files for m in per_file.get(f, ())]
+    return _pylint_result(msgs + orphans)
 
 
 # def test_pylint_basic():
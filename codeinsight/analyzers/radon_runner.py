@@ -1,16 +1,44 @@
 from __future__ import annotations
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Mapping
+import multiprocessing
+import os
+
+import radon
 from radon.complexity import cc_visit
 from radon.metrics import mi_visit
 
+from codeinsight.cache import store as cache_store
+from codeinsight.cache.hashing import hash_bytes
+from codeinsight.cache.manifest import file_digests
+
+# results depend on radon's version, so each version gets its own cache folder
+_CACHE_NS = f"radon-{getattr(radon, '__version__', 'unknown')}"
+
+# below this many files the sequential loop beats process-pool startup
+_PARALLEL_MIN_FILES = 4
+
+# run_radon is called from worker threads (UI executor, pipeline pools); fork() there can
+# copy a lock another thread holds into the child, so workers come from a clean process
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
 def calculate_average_complexity(cc_blocks):
     if not cc_blocks:
         return 0.0
     total_complexity = sum(block.complexity for block in cc_blocks)
     return total_complexity / len(cc_blocks)
 
+def _decode(raw: bytes) -> str:
+    # same text read_text(errors="ignore") gives, newlines translated included
+    return raw.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+
 def analyze_file(path: Path,  config: dict | None = None) -> dict:
-    code = path.read_text(encoding="utf-8", errors="ignore")
+    return _analyze_code(_decode(path.read_bytes()), path)
+
+def _analyze_code(code: str, path: Path) -> dict:
     cc_blocks = cc_visit(code) # items
     mi = float(mi_visit(code, multi=False))  # better>65
     return {
@@ -23,34 +51,95 @@ def analyze_file(path: Path,  config: dict | None = None) -> dict:
         "cc_avg": calculate_average_complexity(cc_blocks),
     }
 
-def run_radon(code_dir: Path, config: dict | None = None) -> dict:
+def analyze_file_cached(path: Path, config: dict | None = None, key: str | None = None) -> dict:
+    """
+    analyze_file memoized on disk by file content; path is re-attached on a hit
+    key: content digest when already known (manifest), so a hit never opens the file
+    """
+    raw = None
+    if key is None:
+        raw = path.read_bytes()  # one read serves both the cache key and the analysis
+        key = hash_bytes(raw)
+    hit = cache_store.load(_CACHE_NS, key)
+    if isinstance(hit, dict):
+        return {"path": str(path), **hit}
+    if raw is None:
+        raw = path.read_bytes()
+    res = _analyze_code(_decode(raw), path)
+    cache_store.save(_CACHE_NS, key, {k: v for k, v in res.items() if k != "path"})
+    return res
+
+def _analyze_file_worker(path: Path, key: str | None = None) -> tuple[dict, str]:
+    """
+    module-level so ProcessPoolExecutor can pickle it
+    analysis only: run_radon already knows the key missed and saves the result itself
+    returns (result, content key), the key hashed here when the manifest had none
+    """
+    raw = path.read_bytes()
+    return _analyze_code(_decode(raw), path), key or hash_bytes(raw)
+
+def run_radon(code_dir: Path, config: dict | None = None, files: Iterable[Path] | None = None,
+              digests: Mapping[str, str] | None = None) -> dict:
+    """
+    files: pre-discovered .py paths (saves a second tree walk); rglob when omitted
+    digests: path -> content digest from the manifest, computed here when omitted
+    """
     code_dir = Path(code_dir)
 
     config = config or {}
     complexity_threshold = int(config.get("complexity_threshold", 10))
     maintainability_threshold = int(config.get("maintainability_threshold", 65))
 
-    per_file = []
-    for p in code_dir.rglob("*.py"):
-        # analyze_file should also accept thresholds or read them here
-        res = analyze_file(p, {
-            "complexity_threshold": complexity_threshold,
-            "maintainability_threshold": maintainability_threshold,
-        })
-        per_file.append(res)
+    files = [Path(p) for p in files] if files is not None else list(code_dir.rglob("*.py"))
+    if digests is None:
+        digests = file_digests(code_dir, files)
+    keys = [digests.get(str(p)) for p in files]
+
+    # unchanged files come straight from the cache, only the rest get analyzed
+    per_file: list = [None] * len(files)
+    todo = []
+    for i, (p, k) in enumerate(zip(files, keys)):
+        hit = cache_store.load(_CACHE_NS, k) if k else None
+        if isinstance(hit, dict):
+            per_file[i] = {"path": str(p), **hit}
+        else:
+            todo.append(i)
+
+    if len(todo) > _PARALLEL_MIN_FILES:
+        # cc_visit/mi_visit are pure-Python and hold the GIL, so fan out to processes
+        workers = min(len(todo), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as ex:
+            fresh = list(ex.map(_analyze_file_worker,
+                                [files[i] for i in todo], [keys[i] for i in todo], chunksize=8))
+    else:
+        # spawning a pool costs more than a handful of files
+        fresh = [_analyze_file_worker(files[i], keys[i]) for i in todo]
+    # cache writes stay in this process (workers never touch the store or its lock)
+    for i, (res, key) in zip(todo, fresh):
+        per_file[i] = res
+        cache_store.save(_CACHE_NS, key, {k: v for k, v in res.items() if k != "path"})
 
     # later tune thresholds (?)
-    mi_warn = sum(1 for f in per_file if f.get("mi", 100) < maintainability_threshold)
-    cc_hot = sum(
-        sum(1 for i in f.get("cc_items", []) if i.get("cc", 0) > complexity_threshold)
-        for f in per_file
-    )
+    # one pass for the MI warnings, CC hotspots and both means, so readers don't re-walk the files
+    mi_warn = cc_hot = 0
+    mi_sum = cc_sum = 0.0
+    for f in per_file:
+        mi_sum += f["mi"]
+        cc_sum += f["cc_avg"]
+        if f["mi"] < maintainability_threshold:
+            mi_warn += 1
+        for i in f.get("cc_items", ()):
+            if i.get("cc", 0) > complexity_threshold:
+                cc_hot += 1
+    n = len(per_file)
 
     return { # improve
         "summary": {
             "files": len(per_file),
             "mi_warnings": int(mi_warn),
             "cc_hotspots": int(cc_hot),
+            "mi_avg": mi_sum / n if n else 0.0,
+            "cc_avg": cc_sum / n if n else 0.0,
         },
         "files": per_file,
     }
@@ -0,0 +1,34 @@
+from __future__ import annotations
+from pathlib import Path
+import hashlib
+import mmap
+
+try:
+    import xxhash  # optional, much faster than sha256 for content keys
+except ImportError:
+    xxhash = None
+
+
+def _new_hash():
+    return xxhash.xxh3_64() if xxhash is not None else hashlib.sha256()
+
+
+def hash_bytes(data: bytes) -> str:
+    """content key shared by the analyzer caches"""
+    h = _new_hash()
+    h.update(data)
+    return h.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """hash_bytes of a file's content, streamed instead of loaded into one bytes object"""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # 3.11+: readinto a reused buffer, no copies
+            return hashlib.file_digest(f, _new_hash).hexdigest()
+        h = _new_hash()
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        except ValueError:  # empty files can't be mapped
+            pass
+        return h.hexdigest()
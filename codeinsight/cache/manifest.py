@@ -0,0 +1,81 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+import hashlib
+import os
+import tempfile
+
+from codeinsight.cache import store as cache_store
+from codeinsight.cache.hashing import hash_file
+
+# one manifest per project root: path -> [mtime_ns, size, digest]
+# a file whose stat matches its entry keeps the recorded digest without being read
+_NS = "manifest"
+
+
+def _is_temporary(root: Path) -> bool:
+    """uploads are extracted to a fresh temp dir each time; a manifest there is never read again"""
+    tmp = os.path.realpath(tempfile.gettempdir())
+    try:
+        return os.path.commonpath((tmp, os.path.realpath(root))) == tmp
+    except ValueError:  # windows: root on another drive than %TEMP%
+        return False
+
+
+def _root_key(root: Path) -> str:
+    return hashlib.sha256(str(Path(root).resolve()).encode("utf-8")).hexdigest()
+
+
+def load_manifest(root: Path) -> Dict[str, list]:
+    data = cache_store.load(_NS, _root_key(root))
+    return data if isinstance(data, dict) else {}
+
+
+def save_manifest(root: Path, manifest: Dict[str, list]) -> None:
+    cache_store.save(_NS, _root_key(root), manifest)
+
+
+def diff(files: Iterable[Path], manifest: Dict[str, list]) -> Tuple[List[str], Dict[str, str]]:
+    """
+    splits files by stat against the manifest
+    returns (changed paths, {unchanged path: recorded digest})
+    """
+    changed: List[str] = []
+    unchanged: Dict[str, str] = {}
+    for f in map(str, files):
+        entry = manifest.get(f)
+        try:
+            st = os.stat(f)
+        except OSError:
+            changed.append(f)
+            continue
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            unchanged[f] = entry[2]
+        else:
+            changed.append(f)
+    return changed, unchanged
+
+
+def file_digests(root: Path, files: Iterable[Path]) -> Dict[str, str]:
+    """
+    content digest for every readable file, hashing only what changed since the last run
+    unreadable files are left out (callers fall back to reading them directly)
+    roots under the temp dir are hashed in full and get no manifest
+    """
+    files = [str(f) for f in files]
+    persist = not _is_temporary(root)
+    manifest = load_manifest(root) if persist else {}
+    changed, digests = diff(files, manifest)
+    for f in changed:
+        try:
+            st = os.stat(f)  # stat before read: a write in between is picked up next run
+            digests[f] = hash_file(f)
+        except OSError:
+            manifest.pop(f, None)
+            continue
+        manifest[f] = [st.st_mtime_ns, st.st_size, digests[f]]
+
+    if persist and (changed or len(manifest) != len(digests)):
+        # drop entries for files that are gone so the manifest tracks the tree
+        save_manifest(root, {f: manifest[f] for f in files if f in manifest})
+    return digests
@@ -0,0 +1,81 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Optional
+import json
+import os
+import tempfile
+import threading
+import time
+
+# one folder per namespace, entries fanned out by the first two key chars
+CACHE_ROOT = Path(os.getenv("CODEINSIGHT_CACHE_DIR", ".codeinsight_cache"))
+
+# entries kept per namespace; past that the oldest writes are dropped
+MAX_ENTRIES = int(os.getenv("CODEINSIGHT_CACHE_MAX_ENTRIES", "5000"))
+_PRUNE_EVERY = 256  # saves between prune passes (a pass lists the whole namespace)
+_saves: Dict[str, int] = {}
+_saves_lock = threading.Lock()
+
+
+def _entry_path(namespace: str, key: str) -> Path:
+    return CACHE_ROOT / namespace / key[:2] / f"{key}.json"
+
+
+def load(namespace: str, key: str, max_age: float | None = None) -> Optional[Any]:
+    """cached value, or None on miss / expired / unreadable entry"""
+    path = _entry_path(namespace, key)
+    try:
+        if max_age is not None and time.time() - path.stat().st_mtime > max_age:
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save(namespace: str, key: str, value: Any) -> None:
+    """writes via tmp file + rename so parallel runs never read half an entry"""
+    path = _entry_path(namespace, key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+    except (OSError, TypeError, ValueError):
+        return  # caching is best effort, never break the pipeline
+
+    # first save in this process, then every _PRUNE_EVERY-th one
+    with _saves_lock:
+        n = _saves[namespace] = _saves.get(namespace, 0) + 1
+    if n % _PRUNE_EVERY == 1:
+        prune(namespace)
+
+
+def prune(namespace: str, max_entries: int | None = None) -> int:
+    """drops the least recently written entries beyond max_entries; returns how many went"""
+    limit = MAX_ENTRIES if max_entries is None else max_entries
+    entries = []
+    try:
+        for sub in os.scandir(CACHE_ROOT / namespace):
+            if sub.is_dir():
+                for e in os.scandir(sub.path):
+                    if e.name.endswith(".json"):
+                        entries.append((e.stat().st_mtime, e.path))
+    except OSError:
+        return 0
+    if len(entries) <= limit:
+        return 0
+    entries.sort()
+    removed = 0
+    for _, path in entries[:len(entries) - limit]:
+        try:
+            os.unlink(path)
+            removed += 1
+        except OSError:
+            pass  # a parallel prune got there first
+    return removed
@@ -1,12 +1,13 @@
 from __future__ import annotations
 from pathlib import Path
-from statistics import mean
-from typing import Any, Dict, Tuple
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
+import heapq
 import os
 
-from codeinsight.agents.adk_flow_integration import run_analysis_with_adk_flow, _compute_quality_score
+from codeinsight.agents.adk_flow_integration import run_analysis_with_adk_flow, _compute_quality_score, _radon_means
 from codeinsight.reporting.json_report import (
     save_json_report,
     save_markdown_report,
@@ -14,24 +15,21 @@ from codeinsight.reporting.json_report import (
     save_pair_reports,
 )
 
-#comparison utilities
-def _avg(seq):
-    return sum(seq) / len(seq) if seq else 0.0
+_AGENT_LABELS = {"ollama": "Ollama (local)", "openai": "OpenAI", "none": "No AI (raw results)"}
 
+#comparison utilities
 def _radon_avgs(res: Dict[str, Any]) -> tuple[float, float]:
-    files = (res.get("radon") or {}).get("files") or []
-    mi_vals = [float(f.get("mi", 0.0)) for f in files]
-    cc_vals = [float(f.get("cc_avg", 0.0)) for f in files]
-    return (_avg(mi_vals), _avg(cc_vals))
+    return _radon_means(res.get("radon") or {})
 
 def _pylint_total(res: Dict[str, Any]) -> int:
     return int(((res.get("pylint") or {}).get("summary") or {}).get("total", 0))
 
 def _top_hotspots(res: Dict[str, Any], n: int = 5):
     files = (res.get("radon") or {}).get("files") or []
-    files_sorted = sorted(files, key=lambda f: float(f.get("cc_avg", 0.0)), reverse=True)
+    # top n only; same order (ties included) as sorted(..., reverse=True)[:n]
+    files_top = heapq.nlargest(n, files, key=lambda f: float(f.get("cc_avg", 0.0)))
     out = []
-    for f in files_sorted[:n]:
+    for f in files_top:
         out.append({
             "file": Path(f.get("path", "")).name,
             "cc_avg": round(float(f.get("cc_avg", 0.0)), 1),
@@ -66,9 +64,13 @@ def compare_results(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
         "top_hotspots": {"A": _top_hotspots(a), "B": _top_hotspots(b)},
     }
 
-def run_pair_and_compare(dir_a: Path, dir_b: Path, with_llm: bool = True):
-    """Analyze dir_a and dir_b in parallel, then compare + LLM summary."""
-    res_a, res_b = run_pipeline_pair(dir_a, dir_b)
+def run_pair_and_compare(dir_a: Path, dir_b: Path, with_llm: bool = True,
+                         settings: Optional[Mapping[str, Optional[str]]] = None):
+    """
+    Analyze dir_a and dir_b in parallel, then compare + LLM summary.
+    settings: agent/ADK env snapshot for the whole run (os.environ when omitted)
+    """
+    res_a, res_b = run_pipeline_pair(dir_a, dir_b, settings=settings)
 
     name_a = Path(dir_a).name
     name_b = Path(dir_b).name
@@ -80,7 +82,7 @@ def run_pair_and_compare(dir_a: Path, dir_b: Path, with_llm: bool = True):
         try:
             # minimal fallback:
             from codeinsight.agents.adk_flow_integration import summarize_comparison_with_llm
-            llm_md = summarize_comparison_with_llm(res_a, res_b, cmp)  # returns markdown
+            llm_md = summarize_comparison_with_llm(res_a, res_b, cmp, settings=settings)  # returns markdown
         except Exception as e:
             llm_md = f"_LLM comparison unavailable: {e}_"
 
@@ -100,22 +102,29 @@ def run_pair_and_compare(dir_a: Path, dir_b: Path, with_llm: bool = True):
     return res_a, res_b, cmp, llm_md
 
 # Runs two analyses in parallel and return (resA, resB).
-def run_pipeline_pair(dir_a: Path, dir_b: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+def run_pipeline_pair(dir_a: Path, dir_b: Path,
+                      settings: Optional[Mapping[str, Optional[str]]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     with ThreadPoolExecutor(max_workers=2) as ex:
-        fa = ex.submit(run_pipeline, dir_a)
-        fb = ex.submit(run_pipeline, dir_b)
+        fa = ex.submit(run_pipeline, dir_a, settings)
+        fb = ex.submit(run_pipeline, dir_b, settings)
         res_a = fa.result()
         res_b = fb.result()
     return res_a, res_b
 
-def run_pipeline(code_dir: Path) -> Dict[str, Any]:
+def run_pipeline(code_dir: Path, settings: Optional[Mapping[str, Optional[str]]] = None) -> Dict[str, Any]:
     """
-    radon -> pylint -> recommend/LLM -> merge (manual or adk workflow)
+    (radon || pylint) -> recommend/LLM -> merge (manual or adk workflow)
+    radon and pylint run side by side on a 2-worker pool, like run_pipeline_pair
     quality score
     uses code_auditor _agent for an adk message
+    settings: agent/ADK env snapshot; os.environ when omitted
     """
+    if settings is None:
+        settings = os.environ
     code_dir = Path(code_dir) # ensures the input is always Path
-    result = run_analysis_with_adk_flow(code_dir)
+    # walk the tree once; radon and pylint both get this list
+    py_files = tuple(code_dir.rglob("*.py"))
+    result = run_analysis_with_adk_flow(code_dir, py_files=py_files, settings=settings)
 
     # defensive defaults
     result.setdefault("radon", {"summary": {"files": 0}, "files": []})
@@ -128,14 +137,19 @@ def run_pipeline(code_dir: Path) -> Dict[str, Any]:
     result["quality_score"] = qs
 
     # ensure there is an adk message (if message missing fall back to code_auditor_agent)
-    mode = (os.getenv("CODEINSIGHT_AGENT") or "ollama").lower()
-    label = {"ollama": "Ollama (local)", "openai": "OpenAI", "none": "No AI (raw results)"}.get(mode, mode)
+    mode = (settings.get("CODEINSIGHT_AGENT") or "ollama").lower()
+    label = _AGENT_LABELS.get(mode, mode)
     result.setdefault("adk_message", f"Agent: {label}")
 
     reports_dir = Path("artifacts/reports")
-    json_path = save_json_report(result, reports_dir)
-    md_path = save_markdown_report(result, reports_dir)
-    pdf_path = save_pdf_report(result, reports_dir)
+    reports_dir.mkdir(parents=True, exist_ok=True)  # before the writers race for it
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")  # same name stem for all three files
+    # independent files; the PDF (charts + fpdf) dominates, json/md finish alongside it
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_json = ex.submit(save_json_report, result, reports_dir, ts=ts)
+        f_md = ex.submit(save_markdown_report, result, reports_dir, ts=ts)
+        f_pdf = ex.submit(save_pdf_report, result, reports_dir, ts=ts)
+        json_path, md_path, pdf_path = f_json.result(), f_md.result(), f_pdf.result()
 
     result["report_paths"] = {
         "json": str(json_path),
@@ -1,78 +1,155 @@
+from __future__ import annotations
 from pathlib import Path
 from datetime import datetime
 from typing import Any, Dict, Tuple
 
 import datetime as dt
+import hashlib
 import json
-import matplotlib.pyplot as plt
+import threading
+from matplotlib.figure import Figure  # no pyplot: no GUI backend, no global figure state
 
 try:
     from fpdf import FPDF  # fpdf2
 except Exception:  # PDF optional
     FPDF = None
 
+try:
+    import orjson  # much faster on big reports (pylint messages, cc_items)
+except ImportError:  # JSON via stdlib then
+    orjson = None
+
+def _timestamp(now: datetime | None = None) -> str:
+    """report file name stamp; one per run, shared by every save_* call"""
+    return (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
+
 # JSON
-def save_json_report(data: dict, out_dir: Path) -> Path:
+def _dumps(data: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # e.g. ints beyond 64 bits; let json have a go
+            pass
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _without_cc_items(data: dict) -> dict:
+    """copy of data whose radon files carry cc_max instead of the per-block cc_items list"""
+    radon = data.get("radon")
+    if not isinstance(radon, dict) or not radon.get("files"):
+        return data
+    files = []
+    for f in radon["files"]:
+        if "cc_items" not in f:
+            files.append(f)
+            continue
+        slim = {k: v for k, v in f.items() if k != "cc_items"}
+        slim["cc_max"] = max((i.get("cc", 0) for i in f["cc_items"]), default=0)
+        files.append(slim)
+    return {**data, "radon": {**radon, "files": files}}  # shallow: the caller's result is untouched
+
+def save_json_report(data: dict, out_dir: Path, include_cc_items: bool = False, ts: str | None = None) -> Path:
+    """
+    writes report_<ts>.json into out_dir
+    per-block cc_items dominate the size on big repos, so by default each file
+    keeps only cc_avg and cc_max; include_cc_items=True writes them in full
+    ts: shared timestamp so reports of one run get matching names (now when omitted)
+    """
+    out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ts = ts or _timestamp()
     path = out_dir / f"report_{ts}.json"
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    path.write_bytes(_dumps(data if include_cc_items else _without_cc_items(data)))
     return path
 
 # Markdown
-def save_markdown_report(result: dict, outdir: Path) -> Path:
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+def save_markdown_report(result: dict, outdir: Path, ts: str | None = None) -> Path:
+    outdir = Path(outdir)
+    ts = ts or _timestamp()
     path = outdir / f"report_{ts}.md"
 
-    lines = []
-    lines.append(f"# CodeInsight Report ({ts})\n")
-    lines.append(f"**Files scanned:** {result.get('files_scanned',0)}")
-    lines.append(f"**Issues found:** {result.get('issues_found',0)}")
-    qs = result.get("enhanced_metrics", {}).get("quality_score", 0)
-    lines.append(f"**Quality score:** {qs}/100\n")
-
-    recs = (result.get("recommendations") or {}).get("project_suggestions", [])
-    if recs:
-        lines.append("## Project-level Suggestions")
-        for r in recs:
-            lines.append(f"- {r}")
-
-    ideas = result.get("refactor_ideas", {})
-    if ideas:
-        lines.append("\n## Refactor Ideas (top_files)")
-        for file, tips in ideas.items():
-            lines.append(f"### {file}")
-            for t in tips:
-                lines.append(f"- {t}")
-
+    # straight into the file, no list of lines + join held in memory
     with open(path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+        w = f.write
+        w(f"# CodeInsight Report ({ts})\n\n")
+        w(f"**Files scanned:** {result.get('files_scanned',0)}\n")
+        w(f"**Issues found:** {result.get('issues_found',0)}\n")
+        qs = result.get("enhanced_metrics", {}).get("quality_score", 0)
+        w(f"**Quality score:** {qs}/100\n\n")
+
+        recs = (result.get("recommendations") or {}).get("project_suggestions", [])
+        if recs:
+            w("## Project-level Suggestions\n")
+            for r in recs:
+                w(f"- {r}\n")
+
+        ideas = result.get("refactor_ideas", {})
+        if ideas:
+            w("\n## Refactor Ideas (top_files)\n")
+            for file, tips in ideas.items():
+                w(f"### {file}\n")
+                for t in tips:
+                    w(f"- {t}\n")
     return path
 
 # PDF (weasyprint didn't work)
-def _save_chart_image(data: dict, title: str, outpath: Path):
+_CHART_CACHE: Dict[Tuple[Any, ...], Path] = {}  # (data items, title) -> png already on disk
+_CHART_CACHE_MAX = 64
+_CHART_LOCK = threading.Lock()  # one shared figure, so one chart at a time
+_chart_fig = None
+
+def _chart_axes():
+    # built once and cleared between charts instead of a new figure per chart
+    global _chart_fig
+    if _chart_fig is None:
+        _chart_fig = Figure(figsize=(6, 4))
+        _chart_fig.add_subplot()
+    return _chart_fig, _chart_fig.axes[0]
+
+def _save_chart_image(data: dict, title: str, outdir: Path, prefix: str):
+    """
+    renders a bar chart into outdir; returns an earlier png instead if the same chart was drawn before
+    the file is named by a hash of (data, title), so a cached path always holds that exact chart
+    (timestamp names collide when A and B are reported within the same second)
+    """
     if not data:
         return None
-    plt.figure(figsize=(6, 4))
-    plt.bar(list(data.keys()), list(data.values()))
-    plt.title(title)
-    plt.xticks(rotation=45, ha="right", fontsize=8)
-    plt.tight_layout()
-    plt.savefig(outpath)
-    plt.close()
+    key = (tuple(data.items()), title)
+    hit = _CHART_CACHE.get(key)
+    if hit is not None and hit.exists():
+        return hit
+    outpath = Path(outdir) / f"{prefix}_{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]}.png"
+
+    with _CHART_LOCK:
+        # again under the lock: a thread drawing the same chart may have finished meanwhile,
+        # and rendering again would rewrite the png while that thread's pdf.image reads it
+        hit = _CHART_CACHE.get(key)
+        if hit is not None and hit.exists():
+            return hit
+        fig, ax = _chart_axes()
+        ax.clear()
+        ax.bar(list(data.keys()), list(data.values()))
+        ax.set_title(title)
+        for label in ax.get_xticklabels():
+            label.set(rotation=45, ha="right", fontsize=8)
+        fig.tight_layout()
+        fig.savefig(outpath, dpi=72)
+
+        if len(_CHART_CACHE) >= _CHART_CACHE_MAX:
+            _CHART_CACHE.pop(next(iter(_CHART_CACHE)))  # oldest first
+        _CHART_CACHE[key] = outpath
     return outpath
 
 def _short(s: str, max_len: int = 160) -> str:
     s = str(s or "")
     return s if len(s) <= max_len else s[: max_len - 3] + "..."
 
-def save_pdf_report(result: dict, outdir: Path) -> Path:
+def save_pdf_report(result: dict, outdir: Path, ts: str | None = None) -> Path:
     # lazy import so the app still runs if fpdf2 is missing
     from fpdf import FPDF
 
+    outdir = Path(outdir)
     outdir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ts = ts or _timestamp()
     path = outdir / f"report_{ts}.pdf"
 
     pdf = FPDF()
@@ -123,13 +200,15 @@ def save_pdf_report(result: dict, outdir: Path) -> Path:
     # charts
     radon_files = (result.get("radon") or {}).get("files", [])
     if radon_files:
-        mi_data = {Path(f["path"]).name: round(float(f["mi"]), 1) for f in radon_files}
-        cc_data = {Path(f["path"]).name: round(float(f["cc_avg"]), 1) for f in radon_files}
+        # one pass over the files for both charts, each name derived once
+        mi_data, cc_data = {}, {}
+        for f in radon_files:
+            name = Path(f["path"]).name
+            mi_data[name] = round(float(f["mi"]), 1)
+            cc_data[name] = round(float(f["cc_avg"]), 1)
 
-        mi_chart = outdir / f"mi_chart_{ts}.png"
-        cc_chart = outdir / f"cc_chart_{ts}.png"
-        _save_chart_image(mi_data, "Maintainability Index (higher is better)", mi_chart)
-        _save_chart_image(cc_data, "Cyclomatic Complexity (lower is better)", cc_chart)
+        mi_chart = _save_chart_image(mi_data, "Maintainability Index (higher is better)", outdir, "mi_chart")
+        cc_chart = _save_chart_image(cc_data, "Cyclomatic Complexity (lower is better)", outdir, "cc_chart")
 
         pdf.ln(6)
         set_bold(12)
@@ -138,10 +217,10 @@ def save_pdf_report(result: dict, outdir: Path) -> Path:
         # Always position images at left margin and use available width
         x = pdf.l_margin
         w = w_available()
-        if mi_chart.exists():
+        if mi_chart and mi_chart.exists():
             pdf.image(str(mi_chart), x=x, w=w)
             pdf.ln(3)
-        if cc_chart.exists():
+        if cc_chart and cc_chart.exists():
             pdf.image(str(cc_chart), x=x, w=w)
             pdf.ln(3)
 
@@ -167,7 +246,7 @@ def save_pdf_report(result: dict, outdir: Path) -> Path:
     return path
 
 def to_json_bytes(data: dict) -> bytes:
-    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return _dumps(data)
 
 def save_pair_reports(
     a: Tuple[str, Dict[str, Any]],
@@ -194,8 +273,9 @@ def save_pair_reports(
     name_a, data_a = a
     name_b, data_b = b
 
-    ts = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
-    root = Path("reports") / f"{ts}_{name_a}_vs_{name_b}"
+    now = dt.datetime.now()
+    ts = _timestamp(now)  # one stamp for all six files of this pair
+    root = Path("reports") / f"{now.strftime('%Y%m%d-%H%M%S')}_{name_a}_vs_{name_b}"
     out_a = root / name_a
     out_b = root / name_b
     out_a.mkdir(parents=True, exist_ok=True)
@@ -210,7 +290,7 @@ def save_pair_reports(
         ]
         for key, ext, func in tasks:
             try:
-                path = func(report_data, str(outdir))
+                path = func(report_data, outdir, ts=ts)
                 if not path:
                     path = outdir / f"{proj_name}.{ext}"
                 created[key] = str(path)
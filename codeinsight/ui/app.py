@@ -1,15 +1,19 @@
 from pathlib import Path
-import io
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import gc
+import hashlib
 import os
-import zipfile
 import tempfile
+import time
 
-import altair as alt
-import pandas as pd
+# pandas / altair are imported where the results are drawn, not at boot
 import streamlit as st
 
+from codeinsight.agents.adk_flow_integration import is_llm_failure
 from codeinsight.pipeline.runner import run_pair_and_compare
 from codeinsight.reporting.json_report import save_pair_reports
+from codeinsight.ui.zip_extract import extract_zip
 
 # Page setup
 st.set_page_config(
@@ -25,8 +29,8 @@ st.set_page_config(
 )
 
 #2rem ~ 32px
-st.markdown(
-    """
+# all static CSS, sent in a single markdown call per run
+_CSS = """
 <style>
 :root{
     /* Light theme tokens */
@@ -178,12 +182,6 @@ div[data-testid="stCodeBlock"]{
   backdrop-filter: blur(8px); -webkit-backdrop-filter: blur(8px);
 }
 </style>
-""",
-    unsafe_allow_html=True,)
-
-
-
-st.markdown("""
 <style>
 /* === Glass card for containers that have an anchor in their first child block === */
 .stMain [data-testid="stVerticalBlock"]
@@ -208,7 +206,9 @@ st.markdown("""
   margin-top:.25rem;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # invincible anchor
 st.markdown('<a id="page-top"></a>', unsafe_allow_html=True)
@@ -226,7 +226,7 @@ if "report_format" not in st.session_state:
 if "agent_choice" not in st.session_state:
     st.session_state.agent_choice = "Ollama (local)"   # default
 if "model_value" not in st.session_state:
-    st.session_state.model_value = "llama3.1:8b" # safe default
+    st.session_state.model_value = "llama3.1:8b-instruct-q4_K_M" # safe default
 
 with st.sidebar:
     agent_choice = st.selectbox(
@@ -237,7 +237,7 @@ with st.sidebar:
         help="Ollama runs locally. OpenAI uses the OpenAI API. 'No AI' skips LLM suggestions."
     )
     # Model field adapts to agent choice
-    placeholder = "llama3.1:8b" if agent_choice == "Ollama (local)" else "gpt-4o-mini"
+    placeholder = "llama3.1:8b-instruct-q4_K_M" if agent_choice == "Ollama (local)" else "gpt-4o-mini"
     model_value = st.text_input("Model", value=st.session_state.model_value or placeholder, key="model_value")
     # adk toggle
     use_adk = st.toggle("Use ADK", value=True, key="use_adk")
@@ -286,236 +286,296 @@ with u1:
 with u2:
     zip_b = st.file_uploader("Second Project (.zip)", type=["zip"], key="zipB")
 
-run_dual = st.button("Run Dual Analysis", disabled=not (zip_a and zip_b))
+analysis_running = "dual_future" in st.session_state
+run_dual = st.button("Run Dual Analysis", disabled=not (zip_a and zip_b) or analysis_running)
 
 
 # Helpers
-def extract_zip(upload, dest: Path) -> Path:
-    with zipfile.ZipFile(io.BytesIO(upload.getvalue())) as zf:
-        for m in zf.infolist():
-            name = m.filename.replace("\\", "/")
-            if name.endswith("/"): # skip directories
-                continue
-            if name.startswith("/") or ".." in name.split("/"):
-                continue # path traversal guard
-            target = dest / name
-            target.parent.mkdir(parents=True, exist_ok=True)
-            with zf.open(m, "r") as src, open(target, "wb") as dst:
-                dst.write(src.read())
-    return dest
-
-def _analyze_zip_pair(zip_a, zip_b):
+def _analyze_zip_pair(zip_a, zip_b, settings: dict):
     with tempfile.TemporaryDirectory(prefix="cim_dual_") as td:
         dir_a = Path(td) / zip_a.name
         dir_b = Path(td) / zip_b.name
         dir_a.mkdir(parents=True, exist_ok=True)
         dir_b.mkdir(parents=True, exist_ok=True)
-        extract_zip(zip_a, dir_a)
-        extract_zip(zip_b, dir_b)
-
-        res_a, res_b, cmp_payload, llm_md = run_pair_and_compare(dir_a, dir_b, with_llm=True)
+        # separate uploads and folders; zlib and the writes release the GIL
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            fut_a = ex.submit(extract_zip, zip_a, dir_a)
+            fut_b = ex.submit(extract_zip, zip_b, dir_b)
+            fut_a.result(); fut_b.result()
+        # zipfile left the uploads wherever it stopped reading; rewind for any later reader
+        zip_a.seek(0); zip_b.seek(0)
+
+        res_a, res_b, cmp_payload, llm_md = run_pair_and_compare(dir_a, dir_b, with_llm=True, settings=settings)
         return res_a, res_b, cmp_payload, llm_md
 
-if run_dual:
-    with st.spinner("Analyzing both projects in parallel…"):
-        res_a, res_b, cmp, llm_md = _analyze_zip_pair(zip_a, zip_b)
-        st.session_state["dual_A"] = res_a
-        st.session_state["dual_B"] = res_b
-        st.session_state["dual_cmp"] = cmp
-        st.session_state["dual_cmp_llm"] = llm_md
-    st.session_state["dual_A"] = res_a
-    st.session_state["dual_B"] = res_b
-    st.session_state["dual_cmp"] = cmp
+def _upload_digest(upload) -> str:
+    # blake2b over the upload's own buffer: fast, no copy, plenty as a cache key
+    return hashlib.blake2b(upload.getbuffer(), digest_size=16).hexdigest()
 
-if st.session_state.get("dual_cmp_llm"):
-    with st.container():
-        glass_anchor()
-        st.markdown("### LLM comparison")
-        st.markdown(st.session_state["dual_cmp_llm"])
+# env the analysis depends on (set from the sidebar above)
+_ANALYSIS_ENV = ("CODEINSIGHT_AGENT", "CODEINSIGHT_OLLAMA_MODEL", "OLLAMA_MODEL", "OPENAI_MODEL", "CODEINSIGHT_USE_ADK")
 
-if "dual_cmp" in st.session_state:
-    projectA = os.path.splitext(zip_a.name)[0]
-    projectB = os.path.splitext(zip_b.name)[0]
+@st.cache_data(show_spinner=False, max_entries=8, persist="disk")
+def _analyze_cached(hash_a: str, hash_b: str, name_a: str, name_b: str, env: tuple, _zip_a, _zip_b):
+    """
+    same zips + same names + same agent settings -> cached result, no extract/analyze
+    the uploads themselves are _-prefixed so streamlit doesn't hash them again
+    persisted to disk, so a server restart doesn't throw finished analyses away
+    env is handed to the pipeline as well: the sidebar rewrites os.environ on every rerun,
+    so the background run must not read it live or its result could land under the wrong key
+    """
+    res = _analyze_zip_pair(_zip_a, _zip_b, dict(zip(_ANALYSIS_ENV, env)))
+    if _llm_failed(res):
+        raise _UncachedResult(res)  # exceptions are never cached: the next Run tries the LLM again
+    return res
+
+class _UncachedResult(Exception):
+    """carries a pair result out of _analyze_cached without letting st.cache_data keep it"""
+    def __init__(self, result):
+        super().__init__("pair result with LLM failures")
+        self.result = result
+
+def _llm_failed(res) -> bool:
+    """an LLM call behind this result failed (server down, no key...), so it must not be pinned"""
+    res_a, res_b, _, llm_md = res
+    return is_llm_failure(llm_md) or any(
+        is_llm_failure(b)
+        for r in (res_a, res_b)
+        for bullets in ((r or {}).get("refactor_ideas") or {}).values()
+        for b in bullets or ()
+    )
 
-    res_a = st.session_state["dual_A"]
-    res_b = st.session_state["dual_B"]
-    cmp = st.session_state["dual_cmp"]
+def _analyze(*args):
+    """_analyze_cached, plus the results it refused to cache"""
+    try:
+        return _analyze_cached(*args)
+    except _UncachedResult as e:
+        return e.result
+
+_CMP_COLUMNS = ["metric", "A", "B", "delta", "better"]
+_CMP_DTYPES = {"A": "float64", "B": "float64", "delta": "float64"}
+_HOTSPOT_COLUMNS = ["file", "cc_avg", "mi"]
+_HOTSPOT_DTYPES = {"cc_avg": "float64", "mi": "float64"}
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _prep_cmp(metrics: list) -> tuple:
+    """comparison table + its long form for the chart; skipped on reruns with the same metrics"""
+    import pandas as pd
+    # schema is fixed (runner.compare_results), so no per-column dtype inference
+    df_cmp = pd.DataFrame.from_records(metrics, columns=_CMP_COLUMNS).astype(_CMP_DTYPES)
+    df_long = df_cmp.melt(id_vars=["metric"], value_vars=["A", "B"],
+                          var_name="project", value_name="value")
+    return df_cmp, df_long
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cmp_chart_spec(metrics: list) -> dict:
+    """vega-lite dict for the grouped bars, so reruns skip building and compiling the altair chart"""
+    import altair as alt
+    _, df_long = _prep_cmp(metrics)
+    ch = (
+        alt.Chart(df_long, title="Project comparison")
+        .mark_bar()
+        .encode(
+            x=alt.X("metric:N", sort=None, axis=alt.Axis(labelAngle=-25, title=None)),
+            y=alt.Y("value:Q", title=None),
+            color=alt.Color("project:N", scale=alt.Scale(range=["#8287ba", "#b195c2"])),
+            tooltip=["metric:N", "project:N", "value:Q"]
+        )
+    )
+    return ch.to_dict()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_report(path: str, mtime: float, binary: bool = False):
+    """report file content; mtime is in the key so a rewritten file is read again"""
+    p = Path(path)
+    return p.read_bytes() if binary else p.read_text(encoding="utf-8")
+
+def _json_preview(d: dict) -> dict:
+    """top-level keys only, lists/dicts shown by size; keeps the debug st.json small"""
+    return {
+        k: f"<list n={len(v)}>" if isinstance(v, list) else f"<dict n={len(v)}>" if isinstance(v, dict) else v
+        for k, v in (d or {}).items()
+    }
 
-    with st.container():
-        glass_anchor()
-        st.subheader(f"Summary ({projectA} vs {projectB})")
+@lru_cache(maxsize=4096)
+def _short_name(path: str) -> str:
+    """file name of a report/analysis path, computed once per path within a script pass"""
+    return Path(path).name
 
-        # quick top-line metrics
-        c1, c2, c3 = st.columns(3)
-        c1.metric(f"Quality score of {projectA}", round(float(res_a.get("quality_score", 0)), 1))
-        c2.metric(f"Quality score of {projectB}", round(float(res_b.get("quality_score", 0)), 1))
-        c3.metric(f"Δ ({projectB} − {projectA})", round(float(res_b.get("quality_score", 0)) - float(res_a.get("quality_score", 0)), 2))
+def _ideas_markdown(ideas: dict) -> str:
+    """all refactor ideas as one markdown blob: one element instead of a few per file"""
+    return "\n\n".join(
+        f"**{_short_name(path)}**\n\n" + "\n".join(f"- {b}" for b in (bullets or [])[:8])
+        for path, bullets in ideas.items()
+    )
 
-        # comparison table
-        df_cmp = pd.DataFrame(cmp["metrics"])
-        st.dataframe(df_cmp, use_container_width=True, hide_index=True)
+# report format -> (report_paths key, mime, read as bytes, widget key prefix)
+_REPORT_FORMATS = {
+    "JSON": ("json", "application/json", False, "dl_json"),
+    "Markdown": ("markdown", "text/markdown", False, "dl_md"),
+    "PDF": ("pdf", "application/pdf", True, "dl_pdf"),
+}
 
-        # grouped bars
-        df_long = df_cmp.melt(id_vars=["metric"], value_vars=["A", "B"],
-                          var_name="project", value_name="value")
-        ch = (
-            alt.Chart(df_long, title="Project comparison")
-            .mark_bar()
-            .encode(
-                x=alt.X("metric:N", sort=None, axis=alt.Axis(labelAngle=-25, title=None)),
-                y=alt.Y("value:Q", title=None),
-                color=alt.Color("project:N", scale=alt.Scale(range=["#8287ba", "#b195c2"])),
-                tooltip=["metric:N", "project:N", "value:Q"]
-            )
+def _render_report(res: dict, fmt: str, idx: int) -> None:
+    """download button (plus preview for Markdown) for one project's report in the chosen format"""
+    kind, mime, binary, key = _REPORT_FORMATS[fmt]
+    path = (res.get("report_paths") or {}).get(kind)
+    if not path:
+        return
+    try:
+        content = _load_report(path, os.path.getmtime(path), binary=binary)
+        st.download_button(
+            f" Download {fmt} report",
+            data=content,
+            file_name=_short_name(path),
+            mime=mime,
+            key=f"{key}{idx}",
         )
-        st.altair_chart(ch, use_container_width=True)
+        # an expander would still ship the whole report to the browser on every rerun
+        if kind == "markdown" and st.checkbox("Preview (Markdown)", key=f"md_preview_{idx}"):
+            st.markdown(content)
+    except Exception as e:
+        st.error(f"Could not read {fmt} report: {e}")
 
-        # hotspots side-by-side
-        h1, h2 = st.columns(2)
-        h1.subheader(f"Top hotspots — Project {projectA}")
-        h1.dataframe(pd.DataFrame(cmp["top_hotspots"]["A"]), use_container_width=True, hide_index=True)
-        h2.subheader(f"Top hotspots — Project {projectB}")
-        h2.dataframe(pd.DataFrame(cmp["top_hotspots"]["B"]), use_container_width=True, hide_index=True)
+def _hotspots_df(rows: list):
+    import pandas as pd
+    return pd.DataFrame.from_records(rows, columns=_HOTSPOT_COLUMNS).astype(_HOTSPOT_DTYPES)
 
-    r1, r2 = st.columns(2, gap="large")
+def _indexed(df, col: str):
+    # st.table has no hide_index, so let the label column be the index instead
+    return df.set_index(col) if col in df.columns else df
 
-    with st.container():
-        glass_anchor()
-        st.header(f"Refactor ideas — {projectA}")
-        ideas_a = (res_a or {}).get("refactor_ideas") or {}
-        if ideas_a:
-            for path, bullets in ideas_a.items():
-                st.markdown(f"**{Path(path).name}**")
-                for b in (bullets or [])[:8]:
-                    st.write(f"- {b}")
-                st.write("")
+_DUAL_KEYS = ("dual_A", "dual_B", "dual_cmp", "dual_cmp_llm", "dual_error")
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    """background pool for dual runs; lives across reruns so a run outlives the script pass that started it"""
+    return ThreadPoolExecutor(max_workers=2)
+
+if run_dual:
+    # let the previous pair's results go before the new ones are built
+    for k in _DUAL_KEYS:
+        st.session_state.pop(k, None)
+    gc.collect()
+    st.session_state.update({
+        "dual_future": _executor().submit(
+            _analyze,
+            _upload_digest(zip_a), _upload_digest(zip_b), zip_a.name, zip_b.name,
+            tuple(os.getenv(k) for k in _ANALYSIS_ENV), zip_a, zip_b,
+        ),
+        # names kept with the results: the uploaders may be cleared before they're shown
+        "projectA": Path(zip_a.name).stem,
+        "projectB": Path(zip_b.name).stem,
+    })
+
+fut = st.session_state.get("dual_future")
+if fut is not None:
+    if fut.done():
+        del st.session_state["dual_future"]
+        try:
+            res_a, res_b, cmp, llm_md = fut.result()
+        except Exception as e:
+            st.session_state["dual_error"] = f"Dual analysis failed: {type(e).__name__}: {e}"
         else:
-            st.caption("No LLM ideas produced for Project A.")
+            st.session_state.update({"dual_A": res_a, "dual_B": res_b, "dual_cmp": cmp, "dual_cmp_llm": llm_md})
+        st.rerun()  # again from the top: the run button re-enables, results (or the error) render
+    else:
+        # script thread stays free between polls, so the rest of the page keeps working
+        with st.status("Analyzing both projects in parallel…", state="running"):
+            st.write("Extracting, running radon + pylint and asking the agent…")
+        time.sleep(0.5)
+        st.rerun()
+
+if st.session_state.get("dual_error"):
+    st.error(st.session_state["dual_error"])
 
+if st.session_state.get("dual_cmp_llm"):
     with st.container():
         glass_anchor()
-        st.subheader(f"Refactor ideas — {projectB}")
-        ideas_b = (res_b or {}).get("refactor_ideas") or {}
-        if ideas_b:
-            for path, bullets in ideas_b.items():
-                st.markdown(f"**{Path(path).name}**")
-                for b in (bullets or [])[:8]:
-                    st.write(f"- {b}")
-                st.write("")
-        else:
-            st.caption("No LLM ideas produced for Project B.")
-
-
-
-    # reports
-    st.divider()
-    st.subheader("Reports")
-
-
-    fmt = st.radio("Choose report format:", ["JSON", "Markdown", "PDF"],
-                   horizontal=True, key="report_format")
-
-    rA1, rB2 = st.columns(2)
-    with rA1:
-        f"""Reports of the project {projectA}"""
-        paths = res_a.get("report_paths", {})
-        if fmt == "JSON" and "json" in paths:
-            try:
-                with open(paths["json"], "r", encoding="utf-8") as f:
-                    st.download_button(
-                        " Download JSON report",
-                        data=f.read(),
-                        file_name=Path(paths["json"]).name,
-                        mime="application/json",
-                        key="dl_json1",
-                    )
-            except Exception as e:
-                st.error(f"Could not read JSON report: {e}")
-
-        elif fmt == "Markdown" and "markdown" in paths:
-            try:
-                with open(paths["markdown"], "r", encoding="utf-8") as f:
-                    content = f.read()
-                    st.download_button(
-                        " Download Markdown report",
-                        data=content,
-                        file_name=Path(paths["markdown"]).name,
-                        mime="text/markdown",
-                        key="dl_md1",
-                    )
-                    with st.expander("Preview (Markdown)"):
-                        st.markdown(content)
-            except Exception as e:
-                st.error(f"Could not read Markdown report: {e}")
-
-        elif fmt == "PDF" and "pdf" in paths:
-            try:
-                with open(paths["pdf"], "rb") as f:
-                    st.download_button(
-                        " Download PDF report",
-                        data=f.read(),
-                        file_name=Path(paths["pdf"]).name,
-                        mime="application/pdf",
-                        key="dl_pdf1",
-                    )
-            except Exception as e:
-                st.error(f"Could not read PDF report: {e}")
-
-        # debug
-        with st.expander("Raw result (debug)", expanded=False):
-            st.json(res_a)
-
-    with rB2:
-        f"""Reports of the project {projectB}"""
-        paths = res_b.get("report_paths", {})
-        if fmt == "JSON" and "json" in paths:
-            try:
-                with open(paths["json"], "r", encoding="utf-8") as f:
-                    st.download_button(
-                        " Download JSON report",
-                        data=f.read(),
-                        file_name=Path(paths["json"]).name,
-                        mime="application/json",
-                        key="dl_json2",
-                    )
-            except Exception as e:
-                st.error(f"Could not read JSON report: {e}")
-
-        elif fmt == "Markdown" and "markdown" in paths:
-            try:
-                with open(paths["markdown"], "r", encoding="utf-8") as f:
-                    content = f.read()
-                    st.download_button(
-                        " Download Markdown report",
-                        data=content,
-                        file_name=Path(paths["markdown"]).name,
-                        mime="text/markdown",
-                        key="dl_md2",
-                    )
-                    with st.expander("Preview (Markdown)"):
-                        st.markdown(content)
-            except Exception as e:
-                st.error(f"Could not read Markdown report: {e}")
-
-        elif fmt == "PDF" and "pdf" in paths:
-            try:
-                with open(paths["pdf"], "rb") as f:
-                    st.download_button(
-                        " Download PDF report",
-                        data=f.read(),
-                        file_name=Path(paths["pdf"]).name,
-                        mime="application/pdf",
-                        key="dl_pdf2",
-                    )
-            except Exception as e:
-                st.error(f"Could not read PDF report: {e}")
-
-        # debug
-        with st.expander("Raw result (debug)", expanded=False):
-            st.json(res_b)
+        st.markdown("### LLM comparison")
+        st.markdown(st.session_state["dual_cmp_llm"])
 
-primary = st.get_option("theme.primaryColor") or "#F97316"  # istersen tema rengi
-st.markdown(f"""
+if "dual_cmp" in st.session_state:
+    projectA = st.session_state.get("projectA", "A")
+    projectB = st.session_state.get("projectB", "B")
+
+    res_a = st.session_state["dual_A"]
+    res_b = st.session_state["dual_B"]
+    cmp = st.session_state["dual_cmp"]
+
+    tab_sum, tab_a, tab_b, tab_rep = st.tabs(
+        ["Summary", f"Refactor ideas — {projectA}", f"Refactor ideas — {projectB}", "Reports"]
+    )
+
+    with tab_sum:
+        with st.container():
+            glass_anchor()
+            st.subheader(f"Summary ({projectA} vs {projectB})")
+
+            # quick top-line metrics
+            c1, c2, c3 = st.columns(3)
+            c1.metric(f"Quality score of {projectA}", round(float(res_a.get("quality_score", 0)), 1))
+            c2.metric(f"Quality score of {projectB}", round(float(res_b.get("quality_score", 0)), 1))
+            c3.metric(f"Δ ({projectB} − {projectA})", round(float(res_b.get("quality_score", 0)) - float(res_a.get("quality_score", 0)), 2))
+
+            # comparison table
+            df_cmp, _ = _prep_cmp(cmp["metrics"])
+            st.table(_indexed(df_cmp, "metric"))
+
+            # grouped bars
+            # key follows the data: same metrics -> same element, the frontend keeps its chart
+            spec_key = hashlib.blake2b(repr(cmp["metrics"]).encode("utf-8"), digest_size=8).hexdigest()
+            st.vega_lite_chart(_cmp_chart_spec(cmp["metrics"]), use_container_width=True,
+                               key=f"cmp_chart_{spec_key}")
+
+            # hotspots side-by-side
+            h1, h2 = st.columns(2)
+            h1.subheader(f"Top hotspots — Project {projectA}")
+            h1.table(_indexed(_hotspots_df(cmp["top_hotspots"]["A"]), "file"))
+            h2.subheader(f"Top hotspots — Project {projectB}")
+            h2.table(_indexed(_hotspots_df(cmp["top_hotspots"]["B"]), "file"))
+
+    with tab_a:
+        with st.container():
+            glass_anchor()
+            st.header(f"Refactor ideas — {projectA}")
+            ideas_a = (res_a or {}).get("refactor_ideas") or {}
+            if ideas_a:
+                st.markdown(_ideas_markdown(ideas_a))
+            else:
+                st.caption("No LLM ideas produced for Project A.")
+
+    with tab_b:
+        with st.container():
+            glass_anchor()
+            st.subheader(f"Refactor ideas — {projectB}")
+            ideas_b = (res_b or {}).get("refactor_ideas") or {}
+            if ideas_b:
+                st.markdown(_ideas_markdown(ideas_b))
+            else:
+                st.caption("No LLM ideas produced for Project B.")
+
+    with tab_rep:
+        fmt = st.radio("Choose report format:", ["JSON", "Markdown", "PDF"],
+                       horizontal=True, key="report_format")
+
+        rA1, rB2 = st.columns(2)
+        for col, name, res, idx, n in ((rA1, projectA, res_a, 1, "a"), (rB2, projectB, res_b, 2, "b")):
+            with col:
+                f"""Reports of the project {name}"""
+                _render_report(res, fmt, idx)
+
+                # debug; st.json only runs once asked for, and the full dict only on a second opt-in
+                if st.checkbox("Show raw result (debug)", key=f"raw_{n}"):
+                    if st.checkbox("Full result", key=f"raw_full_{n}"):
+                        st.json(res)
+                    else:
+                        st.json(_json_preview(res))
+
+@st.cache_resource
+def _fab_css(primary: str) -> str:
+    """scroll-to-top/bottom buttons; built once per theme color"""
+    return f"""
 <style>
 html {{ scroll-behavior: smooth; }}
 
@@ -541,6 +601,9 @@ html {{ scroll-behavior: smooth; }}
 
 <div class="scroll-fab top"><a href="#page-top" aria-label="Yukarı git">↑</a></div>
 <div class="scroll-fab bottom"><a href="#page-bottom" aria-label="Aşağı git">↓</a></div>
-""", unsafe_allow_html=True)
+"""
+
+primary = st.get_option("theme.primaryColor") or "#F97316"  # istersen tema rengi
+st.markdown(_fab_css(primary), unsafe_allow_html=True)
 
 st.markdown('<a id="page-bottom"></a>', unsafe_allow_html=True)
\ No newline at end of file
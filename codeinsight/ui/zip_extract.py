@@ -0,0 +1,95 @@
+from __future__ import annotations
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import io
+import ntpath
+import os
+import shutil
+import struct
+import zipfile
+
+try:
+    # optional: isal's inflate and crc32 are a few times faster than zlib's
+    from isal import isal_zlib
+except ImportError:
+    isal_zlib = None
+
+# below this many members a single extractall beats the thread/ZipFile setup
+_PARALLEL_MIN_MEMBERS = 64
+
+_CHUNK = 1 << 20
+
+def _inflate_member(data: memoryview, m: zipfile.ZipInfo, dst) -> None:
+    """
+    a deflated member inflated by isal straight from the archive bytes
+    zipfile itself stays on stdlib zlib: the module is shared by every zipfile user in the process
+    """
+    # local header, then name + extra field (their lengths can differ from the central directory's)
+    fh = struct.unpack_from(zipfile.structFileHeader, data, m.header_offset)
+    if fh[0] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad magic number for file header of {m.orig_filename!r}")
+    pos = m.header_offset + zipfile.sizeFileHeader + fh[10] + fh[11]
+    end = pos + m.compress_size
+    d = isal_zlib.decompressobj(-15)
+    crc = 0
+    for i in range(pos, end, _CHUNK):
+        out = d.decompress(data[i:min(i + _CHUNK, end)])
+        crc = isal_zlib.crc32(out, crc)
+        dst.write(out)
+    out = d.flush()
+    crc = isal_zlib.crc32(out, crc)
+    dst.write(out)
+    if crc != m.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file {m.orig_filename!r}")
+
+def _extract_members(data: bytes, members: list, dest: Path) -> None:
+    # own ZipFile per worker: a shared one serializes every read on its file lock
+    # BytesIO over bytes shares the buffer, so this doesn't copy the archive
+    view = memoryview(data)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        for m in members:
+            with open(dest / m.filename, "wb") as dst:
+                if isal_zlib is not None and m.compress_type == zipfile.ZIP_DEFLATED and not m.flag_bits & 0x1:
+                    _inflate_member(view, m, dst)
+                else:  # stored / other codecs / encrypted: zipfile's own reader
+                    with zf.open(m) as src:
+                        shutil.copyfileobj(src, dst, _CHUNK)
+
+def extract_zip(upload, dest: Path) -> Path:
+    # UploadedFile is seekable, so zipfile lists it in place (no getvalue() copy)
+    base = os.path.realpath(dest)
+    with zipfile.ZipFile(upload) as zf:
+        safe = []
+        for m in zf.infolist():
+            # windows-made zips: extract into folders, not "a\\b.py" files
+            name = m.filename.replace("\\", "/")
+            if name.endswith("/"): # skip directories (after the replace: "pkg\\" is one too)
+                continue
+            if ntpath.splitdrive(name)[0]:
+                continue # "D:/x.py", "//host/share/x.py": never relative to dest on any OS
+            target = os.path.normpath(os.path.join(base, name))
+            try:
+                inside = target != base and os.path.commonpath((base, target)) == base
+            except ValueError: # windows: different drives have no common path
+                inside = False
+            if not inside:
+                continue # path traversal guard: absolute names and ../ escapes land outside
+            m.filename = os.path.relpath(target, base)
+            safe.append(m)
+        if len(safe) < _PARALLEL_MIN_MEMBERS:
+            # one call: zipfile streams each member to disk and creates parents as needed
+            zf.extractall(dest, members=safe)
+            return dest
+
+    # big archives: inflate releases the GIL, so members extract in parallel
+    # parents are made up front so workers never race on makedirs
+    for d in {(dest / m.filename).parent for m in safe}:
+        d.mkdir(parents=True, exist_ok=True)
+    workers = min(8, os.cpu_count() or 1)
+    data = upload.getvalue()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        # round-robin so large and small members spread across workers
+        futs = [ex.submit(_extract_members, data, safe[i::workers], dest) for i in range(workers)]
+        for f in futs:
+            f.result()
+    return dest
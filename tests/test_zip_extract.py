@@ -0,0 +1,62 @@
+import io
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from codeinsight.ui import zip_extract
+from codeinsight.ui.zip_extract import extract_zip
+
+
+def _zip(names, method=zipfile.ZIP_DEFLATED):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", method) as zf:
+        for name in names:
+            zf.writestr(zipfile.ZipInfo(name), "" if name.endswith(("/", "\\")) else f"# {name}\n")
+    buf.seek(0)
+    return buf
+
+
+class ExtractZipTest(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.dest = Path(self._td.name) / "out"
+        self.dest.mkdir()
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _extracted(self):
+        return sorted(p.relative_to(self.dest).as_posix() for p in self.dest.rglob("*") if p.is_file())
+
+    def test_backslash_directory_entries(self):
+        extract_zip(_zip(["pkg\\", "pkg\\a.py", "pkg\\sub\\", "pkg\\sub\\b.py"]), self.dest)
+        self.assertEqual(self._extracted(), ["pkg/a.py", "pkg/sub/b.py"])
+
+    def test_parent_escapes_are_skipped(self):
+        extract_zip(_zip(["../evil.py", "a/../../evil.py", "a\\..\\..\\evil.py", "..", "ok.py"]), self.dest)
+        self.assertEqual(self._extracted(), ["ok.py"])
+        self.assertFalse((self.dest.parent / "evil.py").exists())
+
+    def test_names_that_come_back_inside_are_kept(self):
+        extract_zip(_zip(["a/../b.py"]), self.dest)
+        self.assertEqual(self._extracted(), ["b.py"])
+
+    def test_absolute_names_are_skipped(self):
+        extract_zip(_zip(["/etc/evil.py", "\\evil.py", "ok.py"]), self.dest)
+        self.assertEqual(self._extracted(), ["ok.py"])
+
+    def test_drive_letter_names_are_skipped(self):
+        extract_zip(_zip(["D:/evil.py", "c:\\evil.py", "D:evil.py", "//host/share/evil.py", "ok.py"]), self.dest)
+        self.assertEqual(self._extracted(), ["ok.py"])
+
+    def test_parallel_path_applies_the_same_guard(self):
+        names = [f"pkg\\m{i}.py" for i in range(zip_extract._PARALLEL_MIN_MEMBERS)]
+        extract_zip(_zip(["pkg\\", "../evil.py", "D:/evil.py", *names]), self.dest)
+        self.assertEqual(self._extracted(), sorted(n.replace("\\", "/") for n in names))
+        for n in names:
+            self.assertEqual((self.dest / n.replace("\\", "/")).read_text(), f"# {n}\n")
+
+
+if __name__ == "__main__":
+    unittest.main()